@@ -0,0 +1,21 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_alter_booking_experience_alter_booking_room_and_more'),
+        ('experiences', '0006_created_index'),
+        ('rooms', '0008_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'check_in', 'check_out'], name='booking_room_dates_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:29
+
+import django.db.models.deletion
+from datetime import timedelta
+from django.db import migrations, models
+
+
+def backfill_nights(apps, schema_editor):
+    Booking = apps.get_model("bookings", "Booking")
+    BookedNight = apps.get_model("bookings", "BookedNight")
+    bookings = Booking.objects.filter(
+        room__isnull=False, check_in__isnull=False, check_out__isnull=False,
+    ).values_list("pk", "room_id", "check_in", "check_out")
+    nights = [
+        BookedNight(booking_id=pk, room_id=room_id, night=check_in + timedelta(days=day))
+        for pk, room_id, check_in, check_out in bookings.iterator()
+        for day in range((check_out - check_in).days)
+    ]
+    # rooms double booked before the ledger existed keep their first booking's nights
+    BookedNight.objects.bulk_create(nights, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_room_dates_index'),
+        ('rooms', '0008_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookedNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('night', models.DateField()),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booked_nights', to='bookings.booking')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booked_nights', to='rooms.room')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='bookednight',
+            constraint=models.UniqueConstraint(fields=('room', 'night'), name='unique_room_night'),
+        ),
+        migrations.RunPython(backfill_nights, migrations.RunPython.noop),
+    ]
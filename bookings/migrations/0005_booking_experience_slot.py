@@ -0,0 +1,44 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:33
+
+import django.db.models.deletion
+from datetime import datetime
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_slots(apps, schema_editor):
+    Booking = apps.get_model("bookings", "Booking")
+    ExperienceSlot = apps.get_model("experiences", "ExperienceSlot")
+    bookings = Booking.objects.filter(
+        experience__isnull=False, experience_time__isnull=False,
+    ).select_related("experience")
+    for booking in bookings.iterator():
+        experience = booking.experience
+        day = timezone.localtime(booking.experience_time).date()
+        slot, _ = ExperienceSlot.objects.get_or_create(
+            experience=experience,
+            slot_start=timezone.make_aware(datetime.combine(day, experience.start)),
+            defaults={"capacity": experience.capacity, "remaining": experience.capacity},
+        )
+        # sessions booked over capacity before slots existed are simply full
+        slot.remaining = max(slot.remaining - booking.guests, 0)
+        slot.save()
+        booking.experience_slot = slot
+        booking.save(update_fields=["experience_slot"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_bookednight'),
+        ('experiences', '0007_experience_slots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='experience_slot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='experiences.experienceslot'),
+        ),
+        migrations.RunPython(backfill_slots, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from datetime import timedelta
+from django.db import models, transaction
 from common.models import CommonModel
 
 class Booking(CommonModel):
@@ -22,7 +23,58 @@ class Booking(CommonModel):
     check_in = models.DateField(null=True, blank=True)
     check_out = models.DateField(null=True, blank=True)
     experience_time = models.DateTimeField(null=True, blank=True)
+    experience_slot = models.ForeignKey("experiences.ExperienceSlot",
+                                        null=True, blank=True,
+                                        on_delete=models.SET_NULL,
+                                        related_name="bookings",)
     guests = models.PositiveIntegerField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["room", "check_in", "check_out"], name="booking_room_dates_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind.title()} booking for: {self.user}"
+
+    def nights(self):
+        return [self.check_in + timedelta(days=day) for day in range((self.check_out - self.check_in).days)]
+
+    def save(self, *args, **kwargs):
+        # the ledger follows the booking wherever it is saved from
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.book_nights(adding)
+
+    def book_nights(self, adding=False):
+        """ Sync the (room, night) ledger with the booking, raises IntegrityError if a night is taken """
+        nights = set()
+        if self.room_id and self.check_in and self.check_out:
+            nights = set(self.nights())
+        kept = set()
+        if not adding:
+            booked = BookedNight.objects.filter(booking=self)
+            booked.exclude(room=self.room_id, night__in=nights).delete()
+            kept = set(booked.values_list("night", flat=True))
+        BookedNight.objects.bulk_create(
+            [BookedNight(booking=self, room_id=self.room_id, night=night) for night in sorted(nights - kept)]
+        )
+
+
+class BookedNight(models.Model):
+
+    """ One night of a room booking, at most one per room and night """
+    booking = models.ForeignKey("bookings.Booking", on_delete=models.CASCADE,
+                                related_name="booked_nights",)
+    room = models.ForeignKey("rooms.Room", on_delete=models.CASCADE,
+                             related_name="booked_nights",)
+    night = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["room", "night"], name="unique_room_night"),
+        ]
+
     def __str__(self):
-        return f"{self.kind.title()} booking for: {self.user}"
\ No newline at end of file
+        return f"{self.room} / {self.night}"
\ No newline at end of file
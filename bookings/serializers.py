@@ -1,6 +1,8 @@
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from rest_framework.serializers import ModelSerializer
 from rest_framework import serializers
+from experiences.models import ExperienceSlot
 from .models import Booking
 
 class CreateExperienceBookingSerializer(ModelSerializer):
@@ -18,12 +20,37 @@ class CreateExperienceBookingSerializer(ModelSerializer):
         now = timezone.localtime(timezone.now())
         if value < now:
             raise serializers. ValidationError("Can't book in the past.")
-        if Booking.objects.filter(experience_time__date=value.date()).exists():
-            raise serializers.ValidationError("There are already someone's reservation for that date.")
         if value.time() <= ex_start_time or value.time() >= ex_end_time:
             raise serializers.ValidationError("Please book at a valid time.")
         return value
-    
+
+    def validate_guests(self, value):
+        if value < 1:
+            raise serializers.ValidationError("At least one guest is required.")
+        return value
+
+    def claim_slot(self, when, guests):
+        # conditional decrement on the (experience, slot_start) row, so the session can't be overbooked
+        slot = ExperienceSlot.claim(self.context["experience"], when, guests)
+        if slot is None:
+            raise serializers.ValidationError("There are not enough places left in that session.")
+        return slot
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            slot = self.claim_slot(validated_data["experience_time"], validated_data["guests"])
+            return super().create({**validated_data, "experience_slot": slot})
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            if instance.experience_slot_id:
+                ExperienceSlot.release(instance.experience_slot_id, instance.guests)
+            slot = self.claim_slot(
+                validated_data.get("experience_time", instance.experience_time),
+                validated_data.get("guests", instance.guests),
+            )
+            return super().update(instance, {**validated_data, "experience_slot": slot})
+
 
 class CreateRoomBookingSerializer(ModelSerializer): 
     check_in = serializers.DateField()
@@ -49,15 +76,27 @@ class CreateRoomBookingSerializer(ModelSerializer):
         return value
 
     def validate(self, data):
-        room = self.context.get("room")
         if data['check_out'] <= data['check_in']:
             raise serializers.ValidationError("Check in should be smaller than check out.")
-        if Booking.objects.filter(
-            room=room,
-            check_in__lte=data["check_out"], 
-            check_out__gte=data["check_in"],
-            ).exists():
+        return data
+
+    def create(self, validated_data):
+        # the unique (room, night) ledger turns a double booking into an IntegrityError
+        try:
+            with transaction.atomic():
+                booking = super().create(validated_data)
+        except IntegrityError:
             raise serializers.ValidationError("Those (or some of those) dates are already taken.")
+        return booking
+
+class BookingCheckSerializer(serializers.Serializer):
+    room = serializers.IntegerField()
+    check_in = serializers.DateField()
+    check_out = serializers.DateField()
+
+    def validate(self, data):
+        if data['check_out'] <= data['check_in']:
+            raise serializers.ValidationError("Check in should be smaller than check out.")
         return data
 
 class PublicBookingSerializer(ModelSerializer):
@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rooms.calendar import invalidate_calendar
+from experiences.models import ExperienceSlot
+from .models import Booking
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def booking_changed(sender, instance, **kwargs):
+    if instance.room_id:
+        transaction.on_commit(lambda: invalidate_calendar(instance.room_id))
+
+
+@receiver(post_delete, sender=Booking)
+def release_experience_slot(sender, instance, **kwargs):
+    if instance.experience_slot_id:
+        ExperienceSlot.release(instance.experience_slot_id, instance.guests)
@@ -1,3 +1,265 @@
-from django.test import TestCase
+import threading
+from time import sleep
+from datetime import datetime, time, timedelta
+from django.db import IntegrityError, OperationalError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APITestCase
+from rooms.models import Room
+from experiences.models import Experience, ExperienceSlot
+from users.models import User
+from .models import Booking, BookedNight
+from .serializers import CreateRoomBookingSerializer
+
+
+def create_room(owner):
+    return Room.objects.create(
+        name="Room",
+        price=100,
+        rooms=1,
+        toilets=1,
+        description="desc",
+        address="addr",
+        kind=Room.RoomKindChoices.ENTIRE_PLACE,
+        owner=owner,
+    )
+
+
+def day(offset):
+    return timezone.localtime(timezone.now()).date() + timedelta(days=offset)
+
+
+class TestRoomBooking(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="guest")
+        self.room = create_room(self.user)
+        self.url = f"/api/v1/rooms/{self.room.pk}/bookings"
+        self.client.force_login(self.user)
+
+    def book(self, check_in, check_out):
+        return self.client.post(self.url, {"check_in": day(check_in), "check_out": day(check_out), "guests": 1})
+
+    def check(self, check_in, check_out):
+        response = self.client.get(f"{self.url}/check", {"check_in": day(check_in), "check_out": day(check_out)})
+        return response.json()["ok"]
+
+    def test_ledger(self):
+        response = self.book(10, 13)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(BookedNight.objects.values_list("night", flat=True).order_by("night")),
+            [day(10), day(11), day(12)],
+        )
+        self.assertEqual(self.book(12, 14).status_code, 400)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertFalse(self.check(12, 14))
+        # check out day is free for the next guest
+        self.assertTrue(self.check(13, 15))
+        self.assertEqual(self.book(13, 15).status_code, 200)
+        self.assertEqual(BookedNight.objects.count(), 5)
+
+    def test_cancel_frees_nights(self):
+        self.book(10, 13)
+        Booking.objects.get().delete()
+        self.assertEqual(BookedNight.objects.count(), 0)
+        self.assertTrue(self.check(10, 13))
+
+    def test_edit_moves_nights(self):
+        self.book(10, 13)
+        booking = Booking.objects.get()
+        booking.check_in, booking.check_out = day(12), day(15)
+        booking.save()
+        self.assertEqual(
+            list(BookedNight.objects.values_list("night", flat=True).order_by("night")),
+            [day(12), day(13), day(14)],
+        )
+        self.assertEqual(self.book(10, 12).status_code, 200)
+        self.assertEqual(self.book(14, 16).status_code, 400)
+        booking.check_in = day(10)
+        with self.assertRaises(IntegrityError):
+            booking.save()
+        booking.refresh_from_db()
+        self.assertEqual(booking.check_in, day(12))
+
+    def test_batch_check(self):
+        other = create_room(self.user)
+        self.book(10, 13)
+        self.client.logout()
+        checks = [
+            {"room": self.room.pk, "check_in": day(12), "check_out": day(14)},
+            {"room": self.room.pk, "check_in": day(13), "check_out": day(15)},
+            {"room": other.pk, "check_in": day(12), "check_out": day(14)},
+        ]
+        # room lookup + one grouped overlap query, whatever the number of checks
+        with self.assertNumQueries(2):
+            response = self.client.post("/api/v1/rooms/bookings/check", checks, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result["ok"] for result in response.json()], [False, True, True])
+        for room in (self.room, other):
+            self.assertEqual(
+                [result["ok"] for result in response.json() if result["room"] == room.pk],
+                [
+                    self.client.get(
+                        f"/api/v1/rooms/{room.pk}/bookings/check",
+                        {"check_in": check["check_in"], "check_out": check["check_out"]},
+                    ).json()["ok"]
+                    for check in checks if check["room"] == room.pk
+                ],
+            )
+
+    def test_batch_check_errors(self):
+        url = "/api/v1/rooms/bookings/check"
+        response = self.client.post(url, [{"room": self.room.pk, "check_in": day(3), "check_out": day(2)}], format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(url, [{"room": 999, "check_in": day(2), "check_out": day(3)}], format="json")
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(url, [{"room": "not a pk"}] * 101, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("At most 100", response.json()["detail"])
+        self.assertEqual(self.client.post(url, {"room": self.room.pk}, format="json").status_code, 400)
+
+
+class TestExperienceBooking(APITestCase):
+
+    def create_experience(self, name):
+        return Experience.objects.create(
+            name=name,
+            host=self.user,
+            price=100,
+            address="addr",
+            start="10:00",
+            end="12:00",
+            description="desc",
+            capacity=4,
+        )
+
+    def setUp(self):
+        self.user = User.objects.create(username="guest")
+        self.experience = self.create_experience("Kayaking")
+        self.client.force_login(self.user)
+
+    def book(self, experience, guests, at=time(11)):
+        when = timezone.make_aware(datetime.combine(day(5), at))
+        return self.client.post(
+            f"/api/v1/experiences/{experience.pk}/bookings",
+            {"experience_time": when.isoformat(), "guests": guests},
+        )
+
+    def remaining(self, experience):
+        return ExperienceSlot.objects.get(experience=experience).remaining
+
+    def test_capacity(self):
+        self.assertEqual(self.book(self.experience, 3).status_code, 200)
+        self.assertEqual(self.book(self.experience, 2).status_code, 400)
+        # another time inside the same session shares its places
+        self.assertEqual(self.book(self.experience, 1, at=time(10, 30)).status_code, 200)
+        self.assertEqual(self.remaining(self.experience), 0)
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def test_experiences_are_isolated(self):
+        other = self.create_experience("Hiking")
+        self.assertEqual(self.book(self.experience, 4).status_code, 200)
+        self.assertEqual(self.book(other, 4).status_code, 200)
+        self.assertEqual((self.remaining(self.experience), self.remaining(other)), (0, 0))
+
+    def test_update_and_cancel(self):
+        booking_pk = self.book(self.experience, 3).json()["pk"]
+        url = f"/api/v1/experiences/{self.experience.pk}/bookings/{booking_pk}"
+        self.assertEqual(self.client.put(url, {"guests": 4}).status_code, 200)
+        self.assertEqual(self.remaining(self.experience), 0)
+        self.assertEqual(self.client.put(url, {"guests": 5}).status_code, 400)
+        self.assertEqual(self.remaining(self.experience), 0)
+        self.client.delete(url)
+        self.assertEqual(self.remaining(self.experience), 4)
+
+    def test_booking_of_another_experience(self):
+        other = self.create_experience("Hiking")
+        booking_pk = self.book(self.experience, 3).json()["pk"]
+        url = f"/api/v1/experiences/{other.pk}/bookings/{booking_pk}"
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.put(url, {"guests": 4}).status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        self.assertEqual(self.remaining(self.experience), 1)
+        self.assertFalse(ExperienceSlot.objects.filter(experience=other).exists())
+
+
+class TestBookingContention(TransactionTestCase):
+    THREADS = 6
+
+    def setUp(self):
+        self.user = User.objects.create(username="guest")
+        self.room = create_room(self.user)
+
+    # sqlite allows one writer at a time, losers of the lock retry
+    RETRIES = 100
+
+    def attempt(self, barrier, results):
+        serializer = CreateRoomBookingSerializer(
+            data={"check_in": day(10), "check_out": day(14), "guests": 1},
+            context={"room": self.room},
+        )
+        serializer.is_valid(raise_exception=True)
+        barrier.wait()
+        try:
+            for _ in range(self.RETRIES):
+                try:
+                    serializer.save(room=self.room, user=self.user, kind=Booking.BookingKindChoices.ROOM)
+                    results.append("booked")
+                    return
+                except OperationalError:
+                    sleep(0.01)
+                except serializers.ValidationError:
+                    results.append("taken")
+                    return
+            results.append("locked")
+        finally:
+            connection.close()
+
+    def test_concurrent_bookings(self):
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+        threads = [
+            threading.Thread(target=self.attempt, args=(barrier, results))
+            for _ in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(results), ["booked"] + ["taken"] * (self.THREADS - 1))
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(BookedNight.objects.count(), 4)
+
+
+class TestBookedNightBackfill(TransactionTestCase):
+    BEFORE = [("bookings", "0003_room_dates_index")]
+    AFTER = [("bookings", "0004_bookednight")]
+
+    def migrate(self, targets):
+        MigrationExecutor(connection).migrate(targets)
+        # models as of every applied migration, not only the targets' dependencies
+        executor = MigrationExecutor(connection)
+        return executor.loader.project_state(list(executor.recorder.applied_migrations())).apps
+
+    def tearDown(self):
+        # back to the latest schema for the following tests
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_existing_bookings_are_backfilled(self):
+        apps = self.migrate(self.BEFORE)
+        user = apps.get_model("users", "User").objects.create(username="guest")
+        room = apps.get_model("rooms", "Room").objects.create(
+            name="Room", price=100, rooms=1, toilets=1, description="desc", address="addr",
+            kind="entire_place", owner=user,
+        )
+        apps.get_model("bookings", "Booking").objects.create(
+            kind="room", user=user, room=room, check_in=day(10), check_out=day(13), guests=1,
+        )
+        apps = self.migrate(self.AFTER)
+        nights = apps.get_model("bookings", "BookedNight").objects.filter(room=room.pk)
+        self.assertEqual(sorted(nights.values_list("night", flat=True)), [day(10), day(11), day(12)])
 
-# Create your tests here.
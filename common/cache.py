@@ -0,0 +1,34 @@
+import time
+from django.core.cache import cache
+
+
+def get_version(key):
+    """ Current version token stored under key, created on first use """
+    return cache.get_or_set(key, time.time_ns, None)
+
+
+def get_versions(keys):
+    """ get_version of many keys in two cache round trips """
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_version(key):
+    # entries built with the old token are never read again and expire on their own
+    cache.delete(key)
+
+
+def bump_versions(keys):
+    cache.delete_many(keys)
+
+
+def get_or_build(key, build, timeout):
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, timeout)
+    return data
@@ -0,0 +1,11 @@
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+
+def conditional(etag_func=None, last_modified_func=None):
+    """
+    Django's condition() for APIView methods. The functions get the DRF request,
+    already authenticated, and the view kwargs; a matching request gets a 304
+    before the method runs.
+    """
+    return method_decorator(condition(etag_func=etag_func, last_modified_func=last_modified_func))
@@ -0,0 +1,76 @@
+import hashlib
+from datetime import datetime, timezone
+from users.serializers import TinyUserSerializer
+from common.cache import bump_version, bump_versions, get_or_build, get_version, get_versions
+
+CACHE_TIMEOUT = 60 * 60
+# depend on the viewer, never stored
+VIEWER_FIELDS = ("is_owner", "is_liked")
+
+
+def version_key(name, pk=None):
+    # one token per object, and one shared by every object of the kind
+    if pk is None:
+        return f"{name}:detail-version"
+    return f"{name}:{pk}:detail-version"
+
+
+def invalidate_detail(name, pk=None):
+    bump_version(version_key(name, pk))
+
+
+def invalidate_details(name, pks):
+    bump_versions([version_key(name, pk) for pk in pks])
+
+
+def shows_user(created, update_fields):
+    """ Whether a saved User may change what cached details show of their owner or host """
+    if created:
+        return False
+    return update_fields is None or bool(set(update_fields) & set(TinyUserSerializer.Meta.fields))
+
+
+def detail_versions(name, pk):
+    return get_version(version_key(name)), get_version(version_key(name, pk))
+
+
+def many_detail_versions(items):
+    """ Version tokens of every (name, pk) item and of their kinds """
+    keys = [version_key(name) for name in sorted({name for name, _ in items})]
+    keys += [version_key(name, pk) for name, pk in items]
+    return get_versions(keys)
+
+
+def make_etag(*parts):
+    return hashlib.md5(":".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def version_time(version):
+    # tokens are the time.time_ns() of the first read after an invalidation
+    return datetime.fromtimestamp(version / 1e9, tz=timezone.utc)
+
+
+def detail_etag(name, pk, *viewer):
+    """ ETag of a cached detail as seen by a viewer, changing whenever the detail is invalidated """
+    return make_etag(name, pk, *detail_versions(name, pk), *viewer)
+
+
+def detail_last_modified(name, pk):
+    return version_time(max(detail_versions(name, pk)))
+
+
+def get_detail(name, pk, load, serializer_class, owner_field):
+    """
+    Return (owner pk, serialized detail) of an object, cached by pk and version
+    without the viewer dependent fields, which the caller fills in.
+    """
+    key = f"{name}:{pk}:detail:{get_version(version_key(name))}:{get_version(version_key(name, pk))}"
+
+    def build():
+        obj = load(pk)
+        serializer = serializer_class(obj)
+        for field in VIEWER_FIELDS:
+            serializer.fields.pop(field, None)
+        return getattr(obj, owner_field), dict(serializer.data)
+
+    return get_or_build(key, build, CACHE_TIMEOUT)
@@ -0,0 +1,37 @@
+from rest_framework.exceptions import ParseError
+
+
+def get_int(params, name):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ParseError(f"'{name}' should be a number.")
+
+
+def get_int_list(params, name):
+    value = params.get(name)
+    if not value:
+        return []
+    try:
+        return sorted({int(pk) for pk in value.split(",")})
+    except ValueError:
+        raise ParseError(f"'{name}' should be a comma separated list of numbers.")
+
+
+def get_sort(params, sorts, default="newest"):
+    sort = params.get("sort", default)
+    if sort not in sorts:
+        raise ParseError(f"'sort' should be one of {', '.join(sorts)}.")
+    return sorts[sort]
+
+
+def filter_ints(queryset, params, lookups):
+    """ Apply {param: lookup} for every numeric param present in the query string """
+    for name, lookup in lookups.items():
+        value = get_int(params, name)
+        if value is not None:
+            queryset = queryset.filter(**{lookup: value})
+    return queryset
@@ -0,0 +1,75 @@
+import base64
+import binascii
+import json
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+
+    """ Cursor pagination over a unique ordering such as ("-created_at", "-pk") """
+
+    cursor_query_param = "cursor"
+
+    def __init__(self, ordering=("-created_at", "-pk"), page_size=None):
+        self.ordering = ordering
+        self.page_size = page_size or settings.PAGE_SIZE
+
+    def get_fields(self, model):
+        fields = []
+        for name in self.ordering:
+            attname = name.lstrip("-")
+            field = model._meta.pk if attname == "pk" else model._meta.get_field(attname)
+            fields.append((attname, field, name.startswith("-")))
+        return fields
+
+    def encode_cursor(self, row):
+        values = [field.value_to_string(row) for _, field, _ in self.fields]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError
+            return [field.to_python(value) for (_, field, _), value in zip(self.fields, values)]
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            raise ParseError("Invalid cursor.")
+
+    def after(self, values):
+        # (a, b) > (x, y)  ->  a > x OR (a = x AND b > y)
+        condition = Q()
+        equal = Q()
+        for (attname, _, descending), value in zip(self.fields, values):
+            lookup = "lt" if descending else "gt"
+            condition |= equal & Q(**{f"{attname}__{lookup}": value})
+            equal &= Q(**{attname: value})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fields = self.get_fields(queryset.model)
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.after(self.decode_cursor(cursor)))
+        rows = list(queryset[: self.page_size + 1])
+        self.next_row = rows[self.page_size - 1] if len(rows) > self.page_size else None
+        return rows[: self.page_size]
+
+    def get_next_link(self):
+        if self.next_row is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_row))
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
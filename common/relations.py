@@ -0,0 +1,17 @@
+from rest_framework.exceptions import ParseError
+
+
+def resolve_pks(model, pks):
+    """ Fetch the objects for a list of pks in one query, reporting every missing pk at once """
+    name = model._meta.verbose_name.title()
+    if not isinstance(pks, list):
+        raise ParseError(f"{name} should be a list of pks.")
+    try:
+        pks = [int(pk) for pk in pks]
+    except (TypeError, ValueError):
+        raise ParseError(f"{name} should be a list of pks.")
+    objects = model.objects.in_bulk(pks)
+    missing = sorted({pk for pk in pks if pk not in objects})
+    if missing:
+        raise ParseError(f"{name} not found: {', '.join(str(pk) for pk in missing)}")
+    return list(objects.values())
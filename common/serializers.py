@@ -0,0 +1,60 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.serializers import BaseSerializer
+
+
+def get_names(request, param):
+    value = request.query_params.get(param) if request else None
+    if not value:
+        return None
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def fields_key(request):
+    """ Normalized ?fields= and ?include=, which pick the representation of a response """
+    return tuple(",".join(sorted(set(get_names(request, param) or []))) for param in ("fields", "include"))
+
+
+class DynamicFieldsMixin:
+
+    """
+    ?fields=a,b keeps only the listed fields, ?include=c adds fields of
+    Meta.optional_fields, which are left out by default. Dropped fields are
+    removed before serialization, so their methods and relations never run.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        names = self.select_fields(list(self.fields), self.context.get("request"))
+        for name in list(self.fields):
+            if name not in names:
+                self.fields.pop(name)
+
+    @classmethod
+    def select_fields(cls, available, request):
+        optional = getattr(cls.Meta, "optional_fields", ())
+        fields = get_names(request, "fields")
+        include = get_names(request, "include") or []
+        unknown = [name for name in fields or [] if name not in available]
+        unknown += [name for name in include if name not in optional]
+        if unknown:
+            raise ParseError(f"Unknown fields: {', '.join(unknown)}")
+        if fields:
+            return set(fields) | set(include)
+        return {name for name in available if name not in optional} | set(include)
+
+    @classmethod
+    def requested_fields(cls, request):
+        return set(cls(context={"request": request}).fields)
+
+    @classmethod
+    def optimize(cls, queryset, request):
+        """ select_related / prefetch_related the nested relations that will be serialized """
+        for field in cls(context={"request": request}).fields.values():
+            if not isinstance(field, BaseSerializer):
+                continue
+            relation = queryset.model._meta.get_field(field.source)
+            if relation.many_to_many or relation.one_to_many:
+                queryset = queryset.prefetch_related(field.source)
+            else:
+                queryset = queryset.select_related(field.source)
+        return queryset
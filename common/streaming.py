@@ -0,0 +1,33 @@
+import json
+from itertools import islice
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+CHUNK_SIZE = 500
+
+
+def wants_stream(request):
+    return request.query_params.get("stream") == "true"
+
+
+def iter_json(queryset, serializer_class, context, chunk_size):
+    # prefetch_related lookups are run once per chunk by iterator()
+    rows = queryset.iterator(chunk_size=chunk_size)
+    separator = ""
+    yield "["
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        data = serializer_class(chunk, many=True, context=context).data
+        yield separator + ",".join(json.dumps(item, cls=JSONEncoder, ensure_ascii=False) for item in data)
+        separator = ","
+    yield "]"
+
+
+def stream_json(queryset, serializer_class, context=None, chunk_size=CHUNK_SIZE):
+    """ Render a whole queryset as a JSON array, serializing one chunk of rows at a time """
+    return StreamingHttpResponse(
+        iter_json(queryset, serializer_class, context or {}, chunk_size),
+        content_type="application/json",
+    )
@@ -47,6 +47,7 @@ CUSTOM_APPS = [
     'common.apps.CommonConfig',
     'users.apps.UsersConfig',
     'rooms.apps.RoomsConfig',
+    'search.apps.SearchConfig',
 ]
 
 SYSTEM_APPS = [
@@ -102,6 +103,13 @@ DATABASES = {
     }
 }
 
+# Cache
+# e.g. CACHE_URL=filecache:///var/tmp/django_cache
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -20,6 +20,7 @@ class MessageAdmin(admin.ModelAdmin):
         "room",
         "created_at"
     )
+    list_select_related = ("user", "room")
     list_filter = (
         "created_at",
     )
\ No newline at end of file
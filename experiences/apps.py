@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ExperiencesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'experiences'
+
+    def ready(self):
+        from . import signals
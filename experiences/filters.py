@@ -0,0 +1,27 @@
+from common.filters import filter_ints, get_sort
+
+SORTS = {
+    "newest": ("-created_at", "-pk"),
+    "price": ("price", "pk"),
+    "-price": ("-price", "-pk"),
+    "rating": ("-rating_avg", "-pk"),
+    "duration": ("duration_minutes", "pk"),
+    "-duration": ("-duration_minutes", "-pk"),
+}
+
+
+def get_ordering(params):
+    return get_sort(params, SORTS)
+
+
+def filter_experiences(experiences, params):
+    for name in ("city", "country"):
+        if params.get(name):
+            experiences = experiences.filter(**{name: params[name]})
+    return filter_ints(experiences, params, {
+        "min_price": "price__gte",
+        "max_price": "price__lte",
+        "min_duration": "duration_minutes__gte",
+        "max_duration": "duration_minutes__lte",
+        "category": "category",
+    })
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:26
+
+from django.db import migrations, models
+from django.db.models import Case, Count, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+
+
+def backfill_ratings(apps, schema_editor):
+    Experience = apps.get_model("experiences", "Experience")
+    Review = apps.get_model("reviews", "Review")
+    related = Review.objects.filter(experience=OuterRef("pk")).order_by().values("experience")
+    Experience.objects.update(
+        review_count=Coalesce(Subquery(related.annotate(total=Count("pk")).values("total")), 0),
+        rating_sum=Coalesce(Subquery(related.annotate(total=Sum("rating")).values("total")), 0),
+    )
+    Experience.objects.update(
+        rating_avg=Case(
+            When(review_count=0, then=Value(0.0)),
+            default=Cast("rating_sum", FloatField()) / F("review_count"),
+            output_field=FloatField(),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiences', '0004_alter_experience_category_alter_experience_host_and_more'),
+        ('reviews', '0002_alter_review_experience_alter_review_room_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='experience',
+            name='rating_avg',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='experience',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='experience',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0003_alter_category_kind'),
+        ('experiences', '0005_experience_rating_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='experience',
+            index=models.Index(fields=['created_at', 'id'], name='experience_created_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiences', '0006_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='experience',
+            name='capacity',
+            field=models.PositiveIntegerField(default=10, help_text='Guests per session'),
+        ),
+        migrations.CreateModel(
+            name='ExperienceSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('slot_start', models.DateTimeField()),
+                ('capacity', models.PositiveIntegerField()),
+                ('remaining', models.PositiveIntegerField()),
+                ('experience', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='experiences.experience')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='experienceslot',
+            constraint=models.UniqueConstraint(fields=('experience', 'slot_start'), name='unique_experience_slot'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_duration(apps, schema_editor):
+    Experience = apps.get_model("experiences", "Experience")
+    experiences = []
+    for experience in Experience.objects.only("start", "end").iterator():
+        start, end = experience.start, experience.end
+        seconds = (end.hour * 3600 + end.minute * 60 + end.second) - (
+            start.hour * 3600 + start.minute * 60 + start.second
+        )
+        experience.duration_minutes = seconds // 60
+        experiences.append(experience)
+    Experience.objects.bulk_update(experiences, ["duration_minutes"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0003_alter_category_kind'),
+        ('experiences', '0007_experience_slots'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='experience',
+            name='duration_minutes',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_duration, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='experience',
+            index=models.Index(fields=['duration_minutes', 'id'], name='experience_duration_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:45
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_review_summary(apps, schema_editor):
+    Experience = apps.get_model("experiences", "Experience")
+    Review = apps.get_model("reviews", "Review")
+    related = Review.objects.filter(experience=OuterRef("pk")).order_by().values("experience")
+    Experience.objects.update(**{
+        f"star_{rating}": Coalesce(
+            Subquery(related.filter(rating=rating).annotate(total=Count("pk")).values("total")), 0,
+        )
+        for rating in range(1, 6)
+    })
+    for pk in Experience.objects.values_list("pk", flat=True).iterator():
+        recent = Review.objects.filter(experience=pk).order_by("-created_at", "-pk").values_list("pk", flat=True)
+        Experience.objects.filter(pk=pk).update(recent_reviews=list(recent[:5]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_review_created_indexes'),
+        ('experiences', '0008_experience_duration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='experience',
+            name='recent_reviews',
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='experience',
+            name='star_1',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='experience',
+            name='star_2',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='experience',
+            name='star_3',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='experience',
+            name='star_4',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='experience',
+            name='star_5',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_review_summary, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,15 @@
+from datetime import datetime
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
 from common.models import CommonModel
 
+class ExperienceQuerySet(models.QuerySet):
+
+    def for_detail(self):
+        # what ExperienceDetailSerializer reads, without a query per relation
+        return self.select_related("videos", "host", "category").prefetch_related("perks")
+
 class Experience(CommonModel):
 
     """ Experience Model Definition """
@@ -12,6 +21,8 @@ class Experience(CommonModel):
     address = models.CharField(max_length=250)
     start = models.TimeField()
     end = models.TimeField()
+    capacity = models.PositiveIntegerField(default=10, help_text="Guests per session")
+    duration_minutes = models.IntegerField(default=0, editable=False)
     description = models.TextField()
     perks = models.ManyToManyField("experiences.Perk", related_name="experiences",)
     category = models.ForeignKey(
@@ -21,23 +32,44 @@ class Experience(CommonModel):
         on_delete=models.SET_NULL,
         related_name="experiences",
     )
+    # maintained by reviews.signals, rebuilt with `manage.py rebuild_ratings`
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_avg = models.FloatField(default=0.0, editable=False)
+    star_1 = models.PositiveIntegerField(default=0, editable=False)
+    star_2 = models.PositiveIntegerField(default=0, editable=False)
+    star_3 = models.PositiveIntegerField(default=0, editable=False)
+    star_4 = models.PositiveIntegerField(default=0, editable=False)
+    star_5 = models.PositiveIntegerField(default=0, editable=False)
+    # pks of the latest reviews, newest first
+    recent_reviews = models.JSONField(default=list, editable=False)
+
+    objects = ExperienceQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="experience_created_idx"),
+            models.Index(fields=["duration_minutes", "id"], name="experience_duration_idx"),
+        ]
+
     def __str__(self):
         return self.name
     def rating(self):
-        count = self.reviews.count()
-        if count == 0:
-            return 0.0
-        else:
-            total_rating = 0
-            for review in self.reviews.all().values("rating"):
-                total_rating += review["rating"]
-            return round(total_rating/count, 2)
-    def total_time(self):
-        seconds = (self.end.hour * 3600 + self.end.minute * 60 + self.end.second) - (
-            self.start.hour * 3600 + self.start.minute * 60 + self.start.second
+        return round(self.rating_avg, 2)
+    def save(self, *args, **kwargs):
+        start = self._meta.get_field("start").to_python(self.start)
+        end = self._meta.get_field("end").to_python(self.end)
+        seconds = (end.hour * 3600 + end.minute * 60 + end.second) - (
+            start.hour * 3600 + start.minute * 60 + start.second
         )
-        hours, remainder = divmod(seconds, 3600)
-        minutes, _ = divmod(remainder, 60)
+        self.duration_minutes = seconds // 60
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"start", "end"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "duration_minutes"}
+        super().save(*args, **kwargs)
+
+    def total_time(self):
+        hours, minutes = divmod(self.duration_minutes, 60)
         return f"{hours}H {minutes}M"
 
 
@@ -50,5 +82,44 @@ class Perk(CommonModel):
 
     def __str__(self):
         return self.name
-    
-    
\ No newline at end of file
+
+
+class ExperienceSlot(CommonModel):
+
+    """ One session of an Experience and the guest places left in it """
+    experience = models.ForeignKey("experiences.Experience", on_delete=models.CASCADE,
+                                   related_name="slots",)
+    slot_start = models.DateTimeField()
+    capacity = models.PositiveIntegerField()
+    remaining = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["experience", "slot_start"], name="unique_experience_slot"),
+        ]
+
+    def __str__(self):
+        return f"{self.experience} / {self.slot_start}"
+
+    @staticmethod
+    def start_for(experience, when):
+        # sessions run daily from experience.start, any time inside one belongs to it
+        day = timezone.localtime(when).date()
+        return timezone.make_aware(datetime.combine(day, experience.start))
+
+    @classmethod
+    def claim(cls, experience, when, guests):
+        """ Take guests places in the session at when, returns None when it is full """
+        slot, _ = cls.objects.get_or_create(
+            experience=experience,
+            slot_start=cls.start_for(experience, when),
+            defaults={"capacity": experience.capacity, "remaining": experience.capacity},
+        )
+        claimed = cls.objects.filter(pk=slot.pk, remaining__gte=guests).update(
+            remaining=F("remaining") - guests,
+        )
+        return slot if claimed else None
+
+    @classmethod
+    def release(cls, slot_id, guests):
+        cls.objects.filter(pk=slot_id).update(remaining=F("remaining") + guests)
@@ -2,8 +2,9 @@ from rest_framework.serializers import ModelSerializer, SerializerMethodField
 from .models import Perk, Experience
 from medias import serializers as media_serializers
 from users import serializers as user_serializers
-from wishlists.models import Wishlist
+from wishlists.liked import get_liked
 from categories.serializers import CategorySerializer
+from common.serializers import DynamicFieldsMixin
 class PerkSerializer(ModelSerializer):
     class Meta:
         model = Perk
@@ -13,7 +14,7 @@ class PerkSerializer(ModelSerializer):
             "explanation"
         )
 
-class ExperienceDetailSerializer(ModelSerializer):
+class ExperienceDetailSerializer(DynamicFieldsMixin, ModelSerializer):
     host = user_serializers.TinyUserSerializer(read_only=True)
     total_time = SerializerMethodField()
     perks = PerkSerializer(read_only=True, many=True)
@@ -21,28 +22,42 @@ class ExperienceDetailSerializer(ModelSerializer):
     rating = SerializerMethodField()
     is_owner = SerializerMethodField()
     is_liked = SerializerMethodField()
-    video = media_serializers.VideoSerializer(read_only = True)
+    video = media_serializers.VideoSerializer(read_only = True, source="videos")
 
     class Meta:
         model = Experience
-        fields = "__all__"
+        # stored review aggregates, served by rating and /reviews/summary
+        exclude = (
+            "review_count",
+            "rating_sum",
+            "rating_avg",
+            "star_1",
+            "star_2",
+            "star_3",
+            "star_4",
+            "star_5",
+            "recent_reviews",
+        )
     
     def get_rating(self, experience):
         return experience.rating()
     def get_is_owner(self, experience):
         request = self.context["request"]
-        return experience.host == request.user
+        return experience.host_id == request.user.pk
     def get_is_liked(self, experience):
-        request = self.context["request"]
-        return Wishlist.objects.filter(user=request.user, experiences__pk=experience.pk).exists()
+        return experience.pk in get_liked(self.context.get("request"))["experience"]
     def get_total_time(self, experience):
         return experience.total_time()
 
-class ExperienceListSerializer(ModelSerializer):
+class ExperienceListSerializer(DynamicFieldsMixin, ModelSerializer):
     rating = SerializerMethodField()
     total_time = SerializerMethodField()
     is_owner = SerializerMethodField()
-    video = media_serializers.VideoSerializer(read_only = True)
+    is_liked = SerializerMethodField()
+    video = media_serializers.VideoSerializer(read_only = True, source="videos")
+    host = user_serializers.TinyUserSerializer(read_only=True)
+    category = CategorySerializer(read_only=True)
+    perks = PerkSerializer(read_only=True, many=True)
 
     class Meta:
         model = Experience
@@ -55,14 +70,22 @@ class ExperienceListSerializer(ModelSerializer):
             "total_time",
             "rating",
             "is_owner",
+            "is_liked",
             "video",
+            "host",
+            "category",
+            "perks",
         )
+        # only sent with ?include=
+        optional_fields = ("host", "category", "perks")
     
     def get_rating(self, experience):
         return experience.rating()
     def get_is_owner(self, experience):
         request = self.context["request"]
-        return experience.host == request.user
+        return experience.host_id == request.user.pk
+    def get_is_liked(self, experience):
+        return experience.pk in get_liked(self.context.get("request"))["experience"]
     def get_total_time(self, experience):
         return experience.total_time()
 
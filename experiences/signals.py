@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from categories.models import Category
+from common.detail import invalidate_detail, invalidate_details, shows_user
+from medias.models import Video
+from reviews.models import Review
+from users.models import User
+from .models import Experience, Perk
+
+
+def invalidate_experience(pk):
+    transaction.on_commit(lambda: invalidate_detail("experience", pk))
+
+
+@receiver(post_save, sender=Experience)
+@receiver(post_delete, sender=Experience)
+def experience_changed(sender, instance, **kwargs):
+    invalidate_experience(instance.pk)
+
+
+@receiver(m2m_changed, sender=Experience.perks.through)
+def experience_perks_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        invalidate_experience(instance.pk)
+    elif pk_set:
+        for pk in pk_set:
+            invalidate_experience(pk)
+    else:
+        transaction.on_commit(lambda: invalidate_detail("experience"))
+
+
+@receiver(post_save, sender=Video)
+@receiver(post_delete, sender=Video)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def experience_child_changed(sender, instance, **kwargs):
+    if instance.experience_id:
+        invalidate_experience(instance.experience_id)
+
+
+@receiver(post_save, sender=User)
+def experience_host_changed(sender, instance, created, update_fields, **kwargs):
+    if shows_user(created, update_fields):
+        pks = list(instance.experiences.values_list("pk", flat=True))
+        transaction.on_commit(lambda: invalidate_details("experience", pks))
+
+
+@receiver(post_save, sender=Perk)
+@receiver(post_delete, sender=Perk)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def experience_relation_changed(sender, **kwargs):
+    # shared by many experiences, drop every cached detail
+    transaction.on_commit(lambda: invalidate_detail("experience"))
@@ -1,3 +1,116 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.http import QueryDict
+from rest_framework.test import APITestCase
+from categories.models import Category
+from medias.models import Video
+from users.models import User
+from .filters import filter_experiences, get_ordering
+from .models import Experience, Perk
 
-# Create your tests here.
+
+class TestExperiences(APITestCase):
+    URL = "/api/v1/experiences/"
+
+    def create_experiences(self, count):
+        for index in range(count):
+            experience = Experience.objects.create(
+                name=f"Experience {index}",
+                host=self.user,
+                price=100,
+                address="addr",
+                start="10:00",
+                end="12:30",
+                description="desc",
+                category=self.category,
+            )
+            experience.perks.add(self.perk)
+            Video.objects.create(experience=experience, file=f"https://example.com/{index}.mp4")
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="host")
+        self.category = Category.objects.create(name="Tours", kind=Category.CategoryKindChoices.EXPERIENCES)
+        self.perk = Perk.objects.create(name="Lunch")
+
+    def test_list_queries(self):
+        self.create_experiences(1)
+        with self.assertNumQueries(1):
+            self.client.get(self.URL)
+        self.create_experiences(2)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.URL)
+        data = response.json()["results"]
+        self.assertEqual(len(data), 3)
+        self.assertEqual(data[0]["total_time"], "2H 30M")
+        self.assertEqual(data[0]["video"]["file"], "https://example.com/1.mp4")
+        self.assertFalse(data[0]["is_owner"])
+
+    def test_detail_queries(self):
+        self.create_experiences(1)
+        experience = Experience.objects.get()
+        # experience with host, category and video + perks
+        with self.assertNumQueries(2):
+            response = self.client.get(f"{self.URL}{experience.pk}")
+        data = response.json()
+        self.assertEqual(data["host"]["username"], "host")
+        self.assertEqual(data["category"]["name"], "Tours")
+        self.assertEqual([perk["name"] for perk in data["perks"]], ["Lunch"])
+        self.assertEqual(data["video"]["file"], "https://example.com/0.mp4")
+        self.assertFalse({"review_count", "rating_sum", "rating_avg", "star_1", "recent_reviews"} & set(data))
+        # cached until the experience or what it shows changes
+        with self.assertNumQueries(0):
+            self.client.get(f"{self.URL}{experience.pk}")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.perk.name = "Dinner"
+            self.perk.save()
+        data = self.client.get(f"{self.URL}{experience.pk}").json()
+        self.assertEqual([perk["name"] for perk in data["perks"]], ["Dinner"])
+        with self.captureOnCommitCallbacks(execute=True):
+            Experience.objects.get().save()
+        with self.assertNumQueries(2):
+            self.client.get(f"{self.URL}{experience.pk}")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.name = "Guide"
+            self.user.save()
+        self.assertEqual(self.client.get(f"{self.URL}{experience.pk}").json()["host"]["name"], "Guide")
+
+
+class TestExperienceDuration(APITestCase):
+    URL = "/api/v1/experiences/search"
+
+    def setUp(self):
+        user = User.objects.create(username="host")
+        for name, start, end in (("Short", "10:00", "10:45"), ("Half day", "09:00", "13:00"), ("Long", "08:00", "18:30")):
+            Experience.objects.create(
+                name=name,
+                host=user,
+                price=100,
+                address="addr",
+                start=start,
+                end=end,
+                description="desc",
+            )
+
+    def search(self, **params):
+        response = self.client.get(self.URL, params)
+        self.assertEqual(response.status_code, 200)
+        return [experience["name"] for experience in response.json()["results"]]
+
+    def test_duration_kept_on_save(self):
+        experience = Experience.objects.get(name="Short")
+        self.assertEqual((experience.duration_minutes, experience.total_time()), (45, "0H 45M"))
+        experience.end = "11:30"
+        experience.save(update_fields=["end"])
+        experience.refresh_from_db()
+        self.assertEqual(experience.duration_minutes, 90)
+
+    def test_filter_and_sort(self):
+        self.assertEqual(self.search(sort="duration"), ["Short", "Half day", "Long"])
+        self.assertEqual(self.search(min_duration=60, sort="-duration"), ["Long", "Half day"])
+        self.assertEqual(self.search(max_duration=240), ["Half day", "Short"])
+
+    def test_duration_sort_uses_index(self):
+        params = QueryDict("min_duration=60&sort=duration")
+        plan = filter_experiences(Experience.objects.all(), params).order_by(*get_ordering(params)).explain()
+        self.assertIn("experience_duration_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
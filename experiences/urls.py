@@ -2,8 +2,11 @@ from django.urls import path
 from . import views
 urlpatterns = [
     path("", views.Experiences.as_view()),
+    path("search", views.ExperienceSearch.as_view()),
     path("<int:pk>", views.ExperienceDetail.as_view()),
     path("<int:pk>/perks", views.ExperiencePerks.as_view()),
+    path("<int:pk>/reviews", views.ExperienceReviews.as_view()),
+    path("<int:pk>/reviews/summary", views.ExperienceReviewSummary.as_view()),
     path("<int:pk>/bookings", views.ExperienceBookings.as_view()),
     path("<int:pk>/bookings/<int:booking_pk>", views.ExperienceBookingDetail.as_view()),
     path("<int:pk>/photos", views.ExperiencePhotos.as_view()),
@@ -7,12 +7,22 @@ from rest_framework.status import HTTP_204_NO_CONTENT, HTTP_400_BAD_REQUEST
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
 from rest_framework.exceptions import ParseError, PermissionDenied
+from common.pagination import KeysetPagination
+from common.conditional import conditional
+from common.detail import detail_etag, detail_last_modified, get_detail
+from common.serializers import fields_key
+from common.relations import resolve_pks
+from common.streaming import stream_json, wants_stream
 from . import serializers
+from .filters import filter_experiences, get_ordering
 from .models import Perk, Experience
 from medias.serializers import VideoSerializer, PhotoSerializer
 from medias.models import Video
 from categories.models import Category
 from bookings.models import Booking
+from reviews.aggregates import get_summary
+from reviews.serializers import ReviewSerializer
+from wishlists.liked import get_liked
 from bookings.serializers import PublicBookingSerializer, CreateExperienceBookingSerializer, PrivateBookingSerializer
 
 class Perks(APIView):
@@ -60,12 +70,19 @@ class Experiences(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get(self, request):
-        all_experiences = Experience.objects.all()
-        serializer = serializers.ExperienceListSerializer(all_experiences,
+        if wants_stream(request):
+            experiences = serializers.ExperienceListSerializer.optimize(
+                Experience.objects.order_by("-created_at", "-pk"), request,
+            )
+            return stream_json(experiences, serializers.ExperienceListSerializer, {"request": request})
+        paginator = KeysetPagination()
+        experiences = serializers.ExperienceListSerializer.optimize(Experience.objects.all(), request)
+        experiences = paginator.paginate_queryset(experiences, request)
+        serializer = serializers.ExperienceListSerializer(experiences,
                                                       many = True,
                                                       context={"request":request}
                                                       )
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         serializer = serializers.ExperienceDetailSerializer(data=request.data)
@@ -77,22 +94,35 @@ class Experiences(APIView):
                 category = Category.objects.get(pk=category_pk)
                 if category.kind == Category.CategoryKindChoices.ROOMS:
                     raise ParseError("The category kind should be 'experiences'.")
-            except category.DoesNotExist:
+            except Category.DoesNotExist:
                 raise ParseError("Category not found.")
-            try:
-                with transaction.atomic():
-                    experience = serializer.save(host=request.user, category=category)
-                    perks = request.data.get('perks')
-                    for perk_pk in perks:
-                        perk = Perk.objects.get(pk=perk_pk)
-                        experience.perks.add(perk)
-                    serializer = serializers.ExperienceDetailSerializer(experience, context={"request": request})
-                    return Response(serializer.data)
-            except Exception:
-                raise ParseError("Perk not found.")
+            perks = resolve_pks(Perk, request.data.get("perks", []))
+            with transaction.atomic():
+                experience = serializer.save(host=request.user, category=category)
+                experience.perks.set(perks)
+            serializer = serializers.ExperienceDetailSerializer(experience, context={"request": request})
+            return Response(serializer.data)
         else:
             return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
 
+class ExperienceSearch(APIView):
+
+    def get(self, request):
+        experiences = serializers.ExperienceListSerializer.optimize(Experience.objects.all(), request)
+        experiences = filter_experiences(experiences, request.query_params)
+        paginator = KeysetPagination(ordering=get_ordering(request.query_params))
+        experiences = paginator.paginate_queryset(experiences, request)
+        serializer = serializers.ExperienceListSerializer(experiences, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data)
+
+def experience_etag(request, pk):
+    return detail_etag("experience", pk, request.user.pk, pk in get_liked(request)["experience"], *fields_key(request))
+
+def experience_last_modified(request, pk):
+    # is_owner and is_liked are only covered by the etag
+    if not request.user.is_authenticated:
+        return detail_last_modified("experience", pk)
+
 class ExperienceDetail(APIView):
 
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -103,10 +133,23 @@ class ExperienceDetail(APIView):
         except Experience.DoesNotExist:
             raise NotFound
 
+    def get_detail_object(self, pk):
+        try:
+            return Experience.objects.for_detail().get(pk=pk)
+        except Experience.DoesNotExist:
+            raise NotFound
+
+    @conditional(etag_func=experience_etag, last_modified_func=experience_last_modified)
     def get(self, request, pk):
-        experience = self.get_object(pk)
-        serializer = serializers.ExperienceDetailSerializer(experience, context={"request": request})
-        return Response(serializer.data)
+        names = serializers.ExperienceDetailSerializer.requested_fields(request)
+        host_pk, data = get_detail(
+            "experience", pk, self.get_detail_object, serializers.ExperienceDetailSerializer, "host_id",
+        )
+        if "is_owner" in names:
+            data["is_owner"] = host_pk == request.user.pk
+        if "is_liked" in names:
+            data["is_liked"] = pk in get_liked(request)["experience"]
+        return Response({name: value for name, value in data.items() if name in names})
 
     def put(self, request, pk):
         experience = self.get_object(pk)
@@ -124,25 +167,20 @@ class ExperienceDetail(APIView):
                         raise ParseError("The category kind should be 'experiences'.")
                 except:
                     raise ParseError("Category not found.")
+            perks = request.data.get("perks")
+            if perks is not None:
+                perks = resolve_pks(Perk, perks)
             try:
                 with transaction.atomic():
                     if category_pk:
                         experience = serializer.save(category=category)
                     else:
                         experience = serializer.save()
-                    perks = request.data.get("perks")
-                    print(perks)
-                    if perks and perks != []:
-                        experience.perks.clear()
-                        for perk_pk in perks:
-                            perk = Perk.objects.get(pk=perk_pk)
-                            experience.perks.add(perk)
-                    elif perks == []:
-                        experience.perks.clear()
+                    if perks is not None:
+                        # set() only deletes and inserts the links that changed
+                        experience.perks.set(perks)
                     serializer = serializers.ExperienceDetailSerializer(experience, context={"request": request})
                     return Response(serializer.data)
-            except Perk.DoesNotExist:
-                raise ParseError("Perk not found")
             except Exception as e:
                 raise ParseError(serializer.errors)
         else:
@@ -156,6 +194,46 @@ class ExperienceDetail(APIView):
         experience.delete()
         return Response(status=HTTP_204_NO_CONTENT)
 
+class ExperienceReviews(APIView):
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get_object(self, pk):
+        try:
+            return Experience.objects.get(pk=pk)
+        except Experience.DoesNotExist:
+            raise NotFound
+
+    def get(self, request, pk):
+        experience = self.get_object(pk)
+        paginator = KeysetPagination()
+        reviews = paginator.paginate_queryset(experience.reviews.select_related("user"), request)
+        serializer = ReviewSerializer(reviews, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    def post(self, request, pk):
+        serializer = ReviewSerializer(data=request.data)
+        if serializer.is_valid():
+            review = serializer.save(
+                user=request.user,
+                experience=self.get_object(pk)
+            )
+            serializer = ReviewSerializer(review)
+            return Response(serializer.data)
+        else:
+            return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
+
+class ExperienceReviewSummary(APIView):
+
+    def get(self, request, pk):
+        try:
+            experience = Experience.objects.get(pk=pk)
+        except Experience.DoesNotExist:
+            raise NotFound
+        summary = get_summary(experience)
+        summary["recent"] = ReviewSerializer(summary["recent"], many=True).data
+        return Response(summary)
+
 class ExperiencePerks(APIView):
     def get_object(self, pk):
         try:
@@ -262,29 +340,22 @@ class ExperienceBookings(APIView):
 class ExperienceBookingDetail(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
-    def get_experience(self, pk):
-        try:
-            return Experience.objects.get(pk=pk)
-        except Experience.DoesNotExist:
-            raise NotFound
-        
-    def get_booking(self, pk):
+    def get_booking(self, pk, booking_pk):
         try:
-            return Booking.objects.get(pk=pk)
+            return Booking.objects.select_related("experience").get(pk=booking_pk, experience=pk)
         except Booking.DoesNotExist:
             raise NotFound
     
     def get(self, request, pk, booking_pk):
-        booking = self.get_booking(booking_pk)
+        booking = self.get_booking(pk, booking_pk)
         serializer = PrivateBookingSerializer(booking)
         return Response(serializer.data)
     
     def put(self, request, pk, booking_pk):
-        booking = self.get_booking(booking_pk)
-        experience = self.get_experience(pk)
+        booking = self.get_booking(pk, booking_pk)
         if booking.user.pk != request.user.pk:
             raise PermissionDenied
-        serializer = CreateExperienceBookingSerializer(booking, data=request.data, context={"experience": experience}, partial=True)
+        serializer = CreateExperienceBookingSerializer(booking, data=request.data, context={"experience": booking.experience}, partial=True)
         if serializer.is_valid():
             booking = serializer.save()
             serializer = PrivateBookingSerializer(booking)
@@ -293,7 +364,7 @@ class ExperienceBookingDetail(APIView):
             return Response(serializer.errors)
         
     def delete(self, request, pk, booking_pk):
-        booking = self.get_booking(booking_pk)
+        booking = self.get_booking(pk, booking_pk)
         if booking.user.pk != request.user.pk:
             raise PermissionDenied
         booking.delete()
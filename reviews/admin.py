@@ -28,7 +28,6 @@ class ScoreFilter(admin.SimpleListFilter):
         ]
     def queryset(self, request, reviews):
         param = self.value()
-        print(param)
         if param=="good":
             return reviews.filter(rating__gte=3)
         elif param=="bad":
@@ -43,6 +42,8 @@ class ReviewAdmin(admin.ModelAdmin):
         "__str__",
         "payload"
     )
+    # __str__ shows the user
+    list_select_related = ("user",)
     list_filter = (
         ScoreFilter,
         # WordFilter,
@@ -0,0 +1,76 @@
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+from .models import Review
+
+STARS = range(1, 6)
+# length of the stored recent_reviews lists
+RECENT_REVIEWS = 5
+
+
+def star_field(rating):
+    return f"star_{rating}"
+
+
+def rating_average():
+    return Case(
+        When(review_count=0, then=Value(0.0)),
+        default=Cast("rating_sum", FloatField()) / F("review_count"),
+        output_field=FloatField(),
+    )
+
+
+def apply_rating(model, pk, rating, count):
+    """ Add (or with a count of -1, remove) a review of rating stars to the stored aggregates of one row """
+    if pk is None:
+        return
+    rows = model.objects.filter(pk=pk)
+    changes = {
+        "review_count": F("review_count") + count,
+        "rating_sum": F("rating_sum") + rating * count,
+    }
+    # reviews written before ratings were validated may be out of range
+    if rating in STARS:
+        changes[star_field(rating)] = F(star_field(rating)) + count
+    rows.update(**changes)
+    rows.update(rating_avg=rating_average())
+
+
+def refresh_recent(model, field, pk):
+    """ Store the pks of the latest reviews of one row, read from the (field, created_at) index """
+    if pk is None:
+        return
+    recent = Review.objects.filter(**{field: pk}).order_by("-created_at", "-pk").values_list("pk", flat=True)
+    model.objects.filter(pk=pk).update(recent_reviews=list(recent[:RECENT_REVIEWS]))
+
+
+def rebuild_ratings(model, field):
+    """ Recompute the stored aggregates of every row of model from the reviews table """
+    related = Review.objects.filter(**{field: OuterRef("pk")}).order_by().values(field)
+    review_count = related.annotate(total=Count("pk")).values("total")
+    rating_sum = related.annotate(total=Sum("rating")).values("total")
+    stars = {
+        star_field(rating): Coalesce(Subquery(related.filter(rating=rating).annotate(total=Count("pk")).values("total")), 0)
+        for rating in STARS
+    }
+    with transaction.atomic():
+        updated = model.objects.update(
+            review_count=Coalesce(Subquery(review_count), 0),
+            rating_sum=Coalesce(Subquery(rating_sum), 0),
+            **stars,
+        )
+        model.objects.update(rating_avg=rating_average())
+        for pk in model.objects.values_list("pk", flat=True).iterator():
+            refresh_recent(model, field, pk)
+    return updated
+
+
+def get_summary(obj):
+    """ Star histogram and latest reviews from the stored summary, without scanning the reviews """
+    reviews = Review.objects.select_related("user").in_bulk(obj.recent_reviews)
+    return {
+        "review_count": obj.review_count,
+        "rating": obj.rating(),
+        "stars": {str(rating): getattr(obj, star_field(rating)) for rating in STARS},
+        "recent": [reviews[pk] for pk in obj.recent_reviews if pk in reviews],
+    }
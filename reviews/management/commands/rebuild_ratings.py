@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from rooms.models import Room
+from experiences.models import Experience
+from reviews.aggregates import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = "Rebuild the stored review aggregates of rooms and experiences"
+
+    def handle(self, *args, **options):
+        for model, field in ((Room, "room"), (Experience, "experience")):
+            updated = rebuild_ratings(model, field)
+            self.stdout.write(
+                self.style.SUCCESS(f"Rebuilt ratings of {updated} {model._meta.verbose_name_plural}")
+            )
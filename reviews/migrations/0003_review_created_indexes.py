@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiences', '0008_experience_duration'),
+        ('reviews', '0002_alter_review_experience_alter_review_room_and_more'),
+        ('rooms', '0008_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['room', 'created_at'], name='review_room_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['experience', 'created_at'], name='review_experience_created_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction
 from common.models import CommonModel
 
 class Review(CommonModel):
@@ -20,7 +21,18 @@ class Review(CommonModel):
                                    related_name="reviews",
                                    )
     payload = models.TextField()
-    rating = models.PositiveIntegerField()
+    rating = models.PositiveIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["room", "created_at"], name="review_room_created_idx"),
+            models.Index(fields=["experience", "created_at"], name="review_experience_created_idx"),
+        ]
 
     def __str__(self):
-        return f"{self.user} / {self.rating}⭐"
\ No newline at end of file
+        return f"{self.user} / {self.rating}⭐"
+
+    def save(self, *args, **kwargs):
+        # keep the review and the rating aggregates updated by reviews.signals together
+        with transaction.atomic():
+            super().save(*args, **kwargs)
\ No newline at end of file
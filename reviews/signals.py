@@ -0,0 +1,43 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rooms.models import Room
+from experiences.models import Experience
+from .aggregates import apply_rating, refresh_recent
+from .models import Review
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_review(sender, instance, **kwargs):
+    instance._previous = None
+    if instance.pk:
+        instance._previous = (
+            Review.objects.filter(pk=instance.pk)
+            .values("rating", "room_id", "experience_id")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def add_review_rating(sender, instance, created, **kwargs):
+    previous = None if created else getattr(instance, "_previous", None)
+    if previous:
+        apply_rating(Room, previous["room_id"], previous["rating"], -1)
+        apply_rating(Experience, previous["experience_id"], previous["rating"], -1)
+    apply_rating(Room, instance.room_id, instance.rating, 1)
+    apply_rating(Experience, instance.experience_id, instance.rating, 1)
+    # the latest reviews only change when a review arrives or moves
+    moved = previous and (previous["room_id"], previous["experience_id"]) != (instance.room_id, instance.experience_id)
+    if created or moved:
+        refresh_recent(Room, "room", instance.room_id)
+        refresh_recent(Experience, "experience", instance.experience_id)
+    if moved:
+        refresh_recent(Room, "room", previous["room_id"])
+        refresh_recent(Experience, "experience", previous["experience_id"])
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_rating(sender, instance, **kwargs):
+    apply_rating(Room, instance.room_id, instance.rating, -1)
+    apply_rating(Experience, instance.experience_id, instance.rating, -1)
+    refresh_recent(Room, "room", instance.room_id)
+    refresh_recent(Experience, "experience", instance.experience_id)
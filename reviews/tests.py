@@ -1,3 +1,185 @@
-from django.test import TestCase
+from io import StringIO
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from rooms.models import Room
+from experiences.models import Experience
+from users.models import User
+from .models import Review
 
-# Create your tests here.
+
+class TestRatingAggregates(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="guest")
+        self.room = Room.objects.create(
+            name="Room",
+            price=100,
+            rooms=1,
+            toilets=1,
+            description="desc",
+            address="addr",
+            kind=Room.RoomKindChoices.ENTIRE_PLACE,
+            owner=self.user,
+        )
+        self.experience = Experience.objects.create(
+            name="Experience",
+            host=self.user,
+            price=100,
+            address="addr",
+            start="10:00",
+            end="12:00",
+            description="desc",
+        )
+
+    def create_review(self, rating, **kwargs):
+        kwargs.setdefault("payload", "review")
+        return Review.objects.create(user=self.user, rating=rating, **kwargs)
+
+    def test_create_update_delete(self):
+        first = self.create_review(5, room=self.room)
+        self.create_review(2, room=self.room)
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.review_count, self.room.rating_sum), (2, 7))
+        self.assertEqual(self.room.rating(), 3.5)
+
+        first.rating = 3
+        first.save()
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.rating(), 2.5)
+
+        first.room = None
+        first.experience = self.experience
+        first.save()
+        self.room.refresh_from_db()
+        self.experience.refresh_from_db()
+        self.assertEqual((self.room.review_count, self.room.rating()), (1, 2.0))
+        self.assertEqual((self.experience.review_count, self.experience.rating()), (1, 3.0))
+
+        first.delete()
+        self.experience.refresh_from_db()
+        self.assertEqual((self.experience.review_count, self.experience.rating()), (0, 0.0))
+
+    def stars(self, obj):
+        obj.refresh_from_db()
+        return [getattr(obj, f"star_{rating}") for rating in range(1, 6)]
+
+    def test_star_histogram(self):
+        first = self.create_review(5, room=self.room)
+        second = self.create_review(2, room=self.room)
+        self.assertEqual(self.stars(self.room), [0, 1, 0, 0, 1])
+        self.assertEqual(self.room.recent_reviews, [second.pk, first.pk])
+        first.rating = 3
+        first.save()
+        self.assertEqual(self.stars(self.room), [0, 1, 1, 0, 0])
+        first.room = None
+        first.experience = self.experience
+        first.save()
+        self.assertEqual(self.stars(self.room), [0, 1, 0, 0, 0])
+        self.assertEqual(self.room.recent_reviews, [second.pk])
+        self.assertEqual(self.stars(self.experience), [0, 0, 1, 0, 0])
+        self.assertEqual(self.experience.recent_reviews, [first.pk])
+        second.delete()
+        self.assertEqual(self.stars(self.room), [0, 0, 0, 0, 0])
+        self.assertEqual(self.room.recent_reviews, [])
+
+    def test_summary(self):
+        reviews = [self.create_review(rating, room=self.room) for rating in (5, 5, 4, 1, 3, 5, 2)]
+        # the room, then the recent reviews by pk
+        with self.assertNumQueries(2):
+            data = self.client.get(f"/api/v1/rooms/{self.room.pk}/reviews/summary").json()
+        self.assertEqual(data["review_count"], 7)
+        self.assertEqual(data["stars"], {"1": 1, "2": 1, "3": 1, "4": 1, "5": 3})
+        self.assertEqual([review["rating"] for review in data["recent"]], [2, 5, 3, 1, 4])
+        reviews[-1].delete()
+        data = self.client.get(f"/api/v1/rooms/{self.room.pk}/reviews/summary").json()
+        self.assertEqual([review["rating"] for review in data["recent"]], [5, 3, 1, 4, 5])
+        data = self.client.get(f"/api/v1/experiences/{self.experience.pk}/reviews/summary").json()
+        self.assertEqual((data["review_count"], data["recent"]), (0, []))
+
+    def test_rating_range(self):
+        self.client.force_login(self.user)
+        for rating, status in ((0, 400), (6, 400), (5, 200)):
+            response = self.client.post(
+                f"/api/v1/experiences/{self.experience.pk}/reviews", {"payload": "review", "rating": rating},
+            )
+            self.assertEqual(response.status_code, status)
+
+    def test_rebuild_ratings(self):
+        self.create_review(4, room=self.room)
+        self.create_review(1, experience=self.experience)
+        Room.objects.update(review_count=0, rating_sum=0, rating_avg=0.0)
+        Experience.objects.update(review_count=9, rating_sum=9, rating_avg=1.0)
+        call_command("rebuild_ratings", stdout=StringIO())
+        self.room.refresh_from_db()
+        self.experience.refresh_from_db()
+        self.assertEqual((self.room.review_count, self.room.rating()), (1, 4.0))
+        self.assertEqual((self.experience.review_count, self.experience.rating()), (1, 1.0))
+        Room.objects.update(star_4=0, recent_reviews=[])
+        call_command("rebuild_ratings", stdout=StringIO())
+        self.assertEqual(self.stars(self.room), [0, 0, 0, 1, 0])
+        self.assertEqual(self.room.recent_reviews, list(self.room.reviews.values_list("pk", flat=True)))
+
+
+class TestReviewPages(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="guest")
+        self.room = Room.objects.create(
+            name="Room",
+            price=100,
+            rooms=1,
+            toilets=1,
+            description="desc",
+            address="addr",
+            kind=Room.RoomKindChoices.ENTIRE_PLACE,
+            owner=self.user,
+        )
+        self.experience = Experience.objects.create(
+            name="Experience",
+            host=self.user,
+            price=100,
+            address="addr",
+            start="10:00",
+            end="12:00",
+            description="desc",
+        )
+        for index in range(7):
+            rating = index % 5 + 1
+            Review.objects.create(user=self.user, room=self.room, payload=f"room {index}", rating=rating)
+            Review.objects.create(user=self.user, experience=self.experience, payload=f"experience {index}", rating=rating)
+
+    def walk(self, url):
+        payloads = []
+        while url:
+            # target, then reviews joined with their users
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            data = response.json()
+            self.assertLessEqual(len(data["results"]), 3)
+            payloads += [review["payload"] for review in data["results"]]
+            self.assertEqual(data["results"][0]["user"]["username"], "guest")
+            url = data["next"]
+        return payloads
+
+    def test_room_reviews(self):
+        payloads = self.walk(f"/api/v1/rooms/{self.room.pk}/reviews")
+        self.assertEqual(payloads, [f"room {index}" for index in reversed(range(7))])
+
+    def test_experience_reviews(self):
+        payloads = self.walk(f"/api/v1/experiences/{self.experience.pk}/reviews")
+        self.assertEqual(payloads, [f"experience {index}" for index in reversed(range(7))])
+        self.client.force_login(self.user)
+        response = self.client.post(
+            f"/api/v1/experiences/{self.experience.pk}/reviews", {"payload": "great", "rating": 5},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.experience.reviews.count(), 8)
+
+    def test_pages_use_index(self):
+        for field, target, index in (
+            ("room", self.room, "review_room_created_idx"),
+            ("experience", self.experience, "review_experience_created_idx"),
+        ):
+            plan = Review.objects.filter(**{field: target}).order_by("-created_at", "-pk")[:4].explain()
+            self.assertIn(index, plan)
+            self.assertNotIn("TEMP B-TREE", plan)
@@ -1,17 +1,87 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.helpers import ActionForm
+from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, IntegerField, Value, When
+from django.db.models.functions import Cast, Greatest, Round
+from django.utils import timezone
+from common.detail import invalidate_detail
+from .facets import invalidate_facets
 from .models import Room, Amenity
 
+
+class RoomActionForm(ActionForm):
+    value = forms.IntegerField(
+        required=False,
+        help_text="Price, percentage or step used by the price actions",
+    )
+
+
+def get_value(model_admin, request, minimum):
+    try:
+        return forms.IntegerField(min_value=minimum).clean(request.POST.get("value"))
+    except ValidationError:
+        model_admin.message_user(request, f"Enter a value of at least {minimum}.", messages.ERROR)
+        return None
+
+
+def update_rooms(model_admin, request, rooms, **changes):
+    """ One UPDATE for all the selected rooms, then what their post_save signals would have done """
+    with transaction.atomic():
+        count = rooms.update(updated_at=timezone.now(), **changes)
+        transaction.on_commit(invalidate_facets)
+        transaction.on_commit(lambda: invalidate_detail("room"))
+    model_admin.message_user(request, f"{count} rooms updated.")
+
+
+def as_price(expression):
+    return Cast(Round(expression), IntegerField())
+
+
 @admin.action(description="Set all prices to zero")
 def reset_prices(model_admin, request, rooms):
-    for room in rooms.all():
-        room.price = 0
-        room.save()
+    update_rooms(model_admin, request, rooms, price=0)
+
+
+@admin.action(description="Set prices to value")
+def set_prices(model_admin, request, rooms):
+    price = get_value(model_admin, request, 0)
+    if price is not None:
+        update_rooms(model_admin, request, rooms, price=price)
+
+
+@admin.action(description="Adjust prices by value %%")
+def adjust_prices(model_admin, request, rooms):
+    percent = get_value(model_admin, request, -100)
+    if percent is not None:
+        price = Cast(F("price"), FloatField()) * (100 + percent) / 100
+        update_rooms(model_admin, request, rooms, price=Greatest(as_price(price), 0))
+
+
+@admin.action(description="Round prices to a step of value")
+def round_prices(model_admin, request, rooms):
+    step = get_value(model_admin, request, 1)
+    if step is not None:
+        update_rooms(model_admin, request, rooms, price=as_price(Cast(F("price"), FloatField()) / step) * step)
+
+
+@admin.action(description="Toggle pet friendly")
+def toggle_pet_friendly(model_admin, request, rooms):
+    update_rooms(
+        model_admin,
+        request,
+        rooms,
+        pet_friendly=Case(When(pet_friendly=True, then=Value(False)), default=Value(True)),
+    )
 
 
 @admin.register(Room)
 class RoomAdmin(admin.ModelAdmin):
 
-    actions = (reset_prices,)
+    action_form = RoomActionForm
+    actions = (reset_prices, set_prices, adjust_prices, round_prices, toggle_pet_friendly)
 
     list_display=(
         "name",
@@ -28,6 +98,19 @@ class RoomAdmin(admin.ModelAdmin):
     search_fields = (
         "^owner__username",
     )
+    list_select_related = ("owner",)
+
+    def get_queryset(self, request):
+        # one changelist query instead of an amenities count per row
+        return super().get_queryset(request).annotate(amenity_count=Count("amenities"))
+
+    @admin.display(description="Total amenities", ordering="amenity_count")
+    def total_amenities(self, room):
+        return room.amenity_count
+
+    @admin.display(description="Rating", ordering="rating_avg")
+    def rating(self, room):
+        return room.rating()
 
 @admin.register(Amenity)
 class AmenityAdmin(admin.ModelAdmin):
@@ -0,0 +1,50 @@
+import base64
+import calendar
+from django.utils import timezone
+from bookings.models import Booking
+from common.cache import bump_version, get_or_build, get_version
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    year = day.year + month // 12
+    month = month % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def version_key(room_pk):
+    return f"rooms:{room_pk}:calendar-version"
+
+
+def invalidate_calendar(room_pk):
+    bump_version(version_key(room_pk))
+
+
+def build_calendar(room_pk, start, end):
+    # bit i (LSB first) of the bitmap is set when the night start + i days is booked
+    days = (end - start).days
+    bitmap = bytearray((days + 7) // 8)
+    bookings = Booking.objects.filter(
+        room_id=room_pk,
+        check_in__lt=end,
+        check_out__gt=start,
+    ).values_list("check_in", "check_out")
+    for check_in, check_out in bookings:
+        first = max((check_in - start).days, 0)
+        last = min((check_out - start).days, days)
+        for index in range(first, last):
+            bitmap[index // 8] |= 1 << (index % 8)
+    return {
+        "start": start,
+        "end": end,
+        "days": days,
+        "bitmap": base64.b64encode(bytes(bitmap)).decode(),
+    }
+
+
+def get_calendar(room_pk, months):
+    start = timezone.localtime(timezone.now()).date()
+    key = f"rooms:{room_pk}:calendar:{get_version(version_key(room_pk))}:{start}:{months}"
+    return get_or_build(key, lambda: build_calendar(room_pk, start, add_months(start, months)), CACHE_TIMEOUT)
@@ -0,0 +1,65 @@
+from django.db.models import Case, Count, IntegerField, Value, When
+from common.cache import bump_version, get_or_build, get_version
+from .models import Room
+
+CACHE_TIMEOUT = 60 * 60
+VERSION_KEY = "rooms:facets-version"
+# lower bounds of the price buckets, the last one is open ended
+PRICE_BUCKETS = (0, 50, 100, 200, 500)
+
+
+def invalidate_facets():
+    bump_version(VERSION_KEY)
+
+
+def bucket_label(index):
+    low = PRICE_BUCKETS[index]
+    if index + 1 == len(PRICE_BUCKETS):
+        return f"{low}+"
+    return f"{low}-{PRICE_BUCKETS[index + 1]}"
+
+
+def price_bucket():
+    return Case(
+        *[When(price__gte=low, then=Value(index)) for index, low in reversed(list(enumerate(PRICE_BUCKETS)))],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def counted(counts):
+    return [
+        {"value": value, "count": count}
+        for value, count in sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))
+    ]
+
+
+def build_facets(rooms):
+    """ Room counts per city, kind, category, price bucket and amenity, in two queries """
+    facets = {name: {} for name in ("city", "kind", "category", "price")}
+    # one GROUP BY over every combination, folded into each facet here
+    groups = (
+        rooms.order_by()
+        .annotate(bucket=price_bucket())
+        .values("city", "kind", "category", "bucket")
+        .annotate(count=Count("pk"))
+    )
+    for group in groups:
+        group["price"] = bucket_label(group.pop("bucket"))
+        count = group.pop("count")
+        for name, value in group.items():
+            facets[name][value] = facets[name].get(value, 0) + count
+    amenities = (
+        Room.amenities.through.objects.filter(room__in=rooms.order_by().values("pk"))
+        .values("amenity")
+        .annotate(count=Count("room"))
+    )
+    facets["amenities"] = {row["amenity"]: row["count"] for row in amenities}
+    return {name: counted(counts) for name, counts in facets.items()}
+
+
+def get_facets(rooms, filtered):
+    """ Facets of the rooms, cached for the unfiltered listing until a room changes """
+    if filtered:
+        return build_facets(rooms)
+    return get_or_build(f"rooms:facets:{get_version(VERSION_KEY)}", lambda: build_facets(rooms), CACHE_TIMEOUT)
@@ -0,0 +1,70 @@
+from datetime import date
+from django.db.models import Count
+from rest_framework.exceptions import ParseError
+from common.filters import filter_ints, get_int_list, get_sort
+from .models import Room
+
+SORTS = {
+    "newest": ("-created_at", "-pk"),
+    "price": ("price", "pk"),
+    "-price": ("-price", "-pk"),
+    "rating": ("-rating_avg", "-pk"),
+}
+# query parameters read by filter_rooms
+FILTERS = (
+    "city", "country", "kind", "pet_friendly", "min_price",
+    "max_price", "rooms", "toilets", "category", "amenities",
+)
+
+
+def get_stay(params):
+    try:
+        check_in = date.fromisoformat(params.get("check_in", ""))
+        check_out = date.fromisoformat(params.get("check_out", ""))
+    except ValueError:
+        raise ParseError("'check_in' and 'check_out' should be dates (YYYY-MM-DD).")
+    if check_out <= check_in:
+        raise ParseError("Check in should be smaller than check out.")
+    return check_in, check_out
+
+
+def get_ordering(params):
+    return get_sort(params, SORTS)
+
+
+def is_filtered(params):
+    return any(params.get(name) for name in FILTERS)
+
+
+def filter_rooms(rooms, params):
+    for name in ("city", "country"):
+        if params.get(name):
+            rooms = rooms.filter(**{name: params[name]})
+    kind = params.get("kind")
+    if kind:
+        if kind not in Room.RoomKindChoices.values:
+            raise ParseError(f"'kind' should be one of {', '.join(Room.RoomKindChoices.values)}.")
+        rooms = rooms.filter(kind=kind)
+    pet_friendly = params.get("pet_friendly")
+    if pet_friendly:
+        if pet_friendly not in ("true", "false"):
+            raise ParseError("'pet_friendly' should be true or false.")
+        rooms = rooms.filter(pet_friendly=pet_friendly == "true")
+    rooms = filter_ints(rooms, params, {
+        "min_price": "price__gte",
+        "max_price": "price__lte",
+        "rooms": "rooms__gte",
+        "toilets": "toilets__gte",
+        "category": "category",
+    })
+    amenities = get_int_list(params, "amenities")
+    if amenities:
+        # rooms having every requested amenity, resolved on the through table
+        rooms = rooms.filter(
+            pk__in=Room.amenities.through.objects.filter(amenity_id__in=amenities)
+            .values("room_id")
+            .annotate(matches=Count("amenity_id"))
+            .filter(matches=len(amenities))
+            .values("room_id")
+        )
+    return rooms
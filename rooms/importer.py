@@ -0,0 +1,161 @@
+import csv
+import json
+from itertools import islice
+from django.db import transaction
+from categories.models import Category
+from medias.models import Photo
+from medias.serializers import PhotoSerializer
+from search.index import index_objects
+from .facets import invalidate_facets
+from .models import Amenity, Room
+from .serializers import RoomDetailSerializer
+
+FORMATS = ("jsonl", "csv")
+# list columns of a csv row, separated by ";"
+LIST_SEPARATOR = ";"
+
+
+class ReadError(Exception):
+
+    """ The input can not be read past a line, badly encoded or malformed """
+
+    def __init__(self, line, message):
+        super().__init__(message)
+        self.line = line
+
+
+def read_jsonl(lines):
+    for line, text in enumerate(lines, 1):
+        if not text.strip():
+            continue
+        try:
+            yield line, json.loads(text)
+        except ValueError:
+            yield line, None
+
+
+def read_csv(lines):
+    reader = csv.DictReader(lines)
+    for row in reader:
+        for name in ("amenities", "photos"):
+            value = row.get(name) or ""
+            row[name] = [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+        # csv photos are bare urls, described by the room name
+        row["photos"] = [{"file": url, "description": row.get("name", "")[:140]} for url in row["photos"]]
+        yield reader.line_num, row
+
+
+def read_rows(lines, format):
+    """ Yield (line number, row) from a text stream, one row at a time """
+    rows = read_csv(lines) if format == "csv" else read_jsonl(lines)
+    line = 0
+    try:
+        for line, row in rows:
+            yield line, row
+    except (UnicodeDecodeError, csv.Error) as error:
+        raise ReadError(line + 1, str(error))
+
+
+def read_chunk(rows, size):
+    """ Up to size rows, and the ReadError that stopped the reading early, if any """
+    chunk = []
+    try:
+        for row in islice(rows, size):
+            chunk.append(row)
+    except ReadError as error:
+        return chunk, error
+    return chunk, None
+
+
+def validate_row(row, categories):
+    """ Return (room, amenity pks, photos) or the errors of the row """
+    if not isinstance(row, dict):
+        return None, "Each row should be a JSON object."
+    serializer = RoomDetailSerializer(data=row)
+    if not serializer.is_valid():
+        return None, serializer.errors
+    try:
+        category = int(row.get("category"))
+    except (TypeError, ValueError):
+        return None, {"category": "Category is required."}
+    if category not in categories:
+        return None, {"category": "Category not found."}
+    amenities = row.get("amenities") or []
+    try:
+        amenities = {int(pk) for pk in amenities}
+    except (TypeError, ValueError):
+        return None, {"amenities": "Amenities should be a list of pks."}
+    photos = []
+    for photo in row.get("photos") or []:
+        photo_serializer = PhotoSerializer(data=photo)
+        if not photo_serializer.is_valid():
+            return None, {"photos": photo_serializer.errors}
+        photos.append(photo_serializer.validated_data)
+    room = Room(**serializer.validated_data, category_id=category)
+    return (room, amenities, photos), None
+
+
+def import_rooms(rows, owner, chunk_size=500):
+    """
+    Create rooms from (line, row) pairs in chunks, yielding a report per chunk.
+    Memory use is bounded by chunk_size, whatever the size of the input.
+    An unreadable line ends the import with an "aborted" report.
+    """
+    categories = set(
+        Category.objects.filter(kind=Category.CategoryKindChoices.ROOMS).values_list("pk", flat=True)
+    )
+    rows = iter(rows)
+    created = 0
+    while True:
+        chunk, read_error = read_chunk(rows, chunk_size)
+        if not chunk and not read_error:
+            break
+        valid = []
+        errors = []
+        if read_error:
+            errors.append({"line": read_error.line, "errors": f"Unreadable line: {read_error}"})
+        for line, row in chunk:
+            result, error = validate_row(row, categories)
+            if error:
+                errors.append({"line": line, "errors": error})
+            else:
+                valid.append((line, result))
+        # one query for the amenities of the whole chunk
+        wanted = set().union(*(amenities for _, (_, amenities, _) in valid))
+        known = set(Amenity.objects.filter(pk__in=wanted).values_list("pk", flat=True))
+        rooms = []
+        for line, (room, amenities, photos) in valid:
+            missing = sorted(amenities - known)
+            if missing:
+                errors.append({
+                    "line": line,
+                    "errors": {"amenities": f"Amenity not found: {', '.join(str(pk) for pk in missing)}"},
+                })
+                continue
+            room.owner = owner
+            rooms.append((room, amenities, photos))
+        with transaction.atomic():
+            Room.objects.bulk_create([room for room, _, _ in rooms])
+            Room.amenities.through.objects.bulk_create([
+                Room.amenities.through(room_id=room.pk, amenity_id=amenity)
+                for room, amenities, _ in rooms
+                for amenity in amenities
+            ])
+            Photo.objects.bulk_create([
+                Photo(room=room, **photo)
+                for room, _, photos in rooms
+                for photo in photos
+            ])
+            # bulk_create skips the post_save signals keeping the index and facets in sync
+            index_objects("room", [room for room, _, _ in rooms])
+            transaction.on_commit(invalidate_facets)
+        created += len(rooms)
+        report = {
+            "line": read_error.line if read_error else chunk[-1][0],
+            "created": created,
+            "errors": sorted(errors, key=lambda error: error["line"]),
+        }
+        if read_error:
+            yield {**report, "aborted": True}
+            break
+        yield report
@@ -0,0 +1,35 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from users.models import User
+from rooms.importer import FORMATS, import_rooms, read_rows
+
+
+class Command(BaseCommand):
+    help = "Import rooms, their amenities and photos from a JSONL or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--owner", required=True, help="username owning the imported rooms")
+        parser.add_argument("--format", choices=FORMATS, help="defaults to the file extension")
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            owner = User.objects.get(username=options["owner"])
+        except User.DoesNotExist:
+            raise CommandError(f"User not found: {options['owner']}")
+        format = options["format"] or os.path.splitext(options["path"])[1].lstrip(".").lower()
+        if format not in FORMATS:
+            raise CommandError(f"Format should be one of {', '.join(FORMATS)}.")
+        failed = 0
+        created = 0
+        with open(options["path"], newline="", encoding="utf-8") as file:
+            for report in import_rooms(read_rows(file, format), owner, options["chunk_size"]):
+                for error in report["errors"]:
+                    self.stderr.write(f"line {error['line']}: {error['errors']}")
+                failed += len(report["errors"])
+                created = report["created"]
+                self.stdout.write(f"line {report['line']}: {created} rooms created")
+                if report.get("aborted"):
+                    raise CommandError(f"Import stopped at line {report['line']}, {created} rooms created")
+        self.stdout.write(self.style.SUCCESS(f"Imported {created} rooms, {failed} rows failed"))
@@ -1,5 +1,25 @@
 from django.db import models
+from django.db.models import Exists, OuterRef
 from common.models import CommonModel
+from bookings.models import Booking
+
+class RoomQuerySet(models.QuerySet):
+
+    def for_detail(self):
+        # what RoomDetailSerializer reads, without a query per relation
+        return self.select_related("owner", "category").prefetch_related("photos", "amenities")
+
+    def available(self, check_in, check_out):
+        # anti-join on the (room, check_in, check_out) booking index
+        return self.exclude(
+            Exists(
+                Booking.objects.filter(
+                    room=OuterRef("pk"),
+                    check_in__lt=check_out,
+                    check_out__gt=check_in,
+                )
+            )
+        )
 
 class Room(CommonModel):
     """ Room Model Definition """
@@ -32,6 +52,30 @@ class Room(CommonModel):
         on_delete=models.SET_NULL,
         related_name="rooms",
     )
+    # maintained by reviews.signals, rebuilt with `manage.py rebuild_ratings`
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_avg = models.FloatField(default=0.0, editable=False)
+    star_1 = models.PositiveIntegerField(default=0, editable=False)
+    star_2 = models.PositiveIntegerField(default=0, editable=False)
+    star_3 = models.PositiveIntegerField(default=0, editable=False)
+    star_4 = models.PositiveIntegerField(default=0, editable=False)
+    star_5 = models.PositiveIntegerField(default=0, editable=False)
+    # pks of the latest reviews, newest first
+    recent_reviews = models.JSONField(default=list, editable=False)
+
+    objects = RoomQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="room_created_idx"),
+            models.Index(fields=["price", "id"], name="room_price_idx"),
+            models.Index(fields=["rating_avg", "id"], name="room_rating_idx"),
+            models.Index(fields=["city", "price"], name="room_city_price_idx"),
+            models.Index(fields=["country", "city", "price"], name="room_country_city_price_idx"),
+            models.Index(fields=["kind", "price"], name="room_kind_price_idx"),
+            models.Index(fields=["category", "price"], name="room_category_price_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -40,14 +84,7 @@ class Room(CommonModel):
         return self.amenities.count()
     
     def rating(self):
-        count = self.reviews.count()
-        if count == 0:
-            return 0.0
-        else:
-            total_rating = 0
-            for review in self.reviews.all().values("rating"):
-                total_rating += review["rating"]
-            return round(total_rating / count, 2)
+        return round(self.rating_avg, 2)
 
 
 class Amenity(CommonModel):
@@ -4,7 +4,8 @@ from users.serializers import TinyUserSerializer
 from categories.serializers import CategorySerializer
 from reviews.serializers import ReviewSerializer
 from medias.serializers import PhotoSerializer
-from wishlists.models import Wishlist
+from wishlists.liked import get_liked
+from common.serializers import DynamicFieldsMixin
 class AmenitySerializer(ModelSerializer):
     class Meta:
         model = Amenity
@@ -14,7 +15,7 @@ class AmenitySerializer(ModelSerializer):
             "description",
         )
 
-class RoomDetailSerializer(ModelSerializer):
+class RoomDetailSerializer(DynamicFieldsMixin, ModelSerializer):
     owner = TinyUserSerializer(read_only=True)
     amenities = AmenitySerializer(read_only=True, many = True)
     category = CategorySerializer(read_only=True, )
@@ -25,29 +26,39 @@ class RoomDetailSerializer(ModelSerializer):
 
     class Meta:
         model = Room
-        fields = "__all__"
+        # stored review aggregates, served by rating and /reviews/summary
+        exclude = (
+            "review_count",
+            "rating_sum",
+            "rating_avg",
+            "star_1",
+            "star_2",
+            "star_3",
+            "star_4",
+            "star_5",
+            "recent_reviews",
+        )
 
     def get_rating(self, room):
-        print(self.context)
         return room.rating()
     
     def get_is_owner(self, room):
         request = self.context.get("request")
         if request:
-            return room.owner == request.user
+            return room.owner_id == request.user.pk
         return False
     
     def get_is_liked(self, room):
-        request = self.context.get("request")
-        if request:
-            if request.user.is_authenticated:
-                return Wishlist.objects.filter(user=request.user, rooms__pk=room.pk).exists()
-        return False
+        return room.pk in get_liked(self.context.get("request"))["room"]
 
-class RoomListSerializer(ModelSerializer):
+class RoomListSerializer(DynamicFieldsMixin, ModelSerializer):
     rating = SerializerMethodField()
     is_owner = SerializerMethodField()
+    is_liked = SerializerMethodField()
     photos = PhotoSerializer(read_only=True, many=True)
+    owner = TinyUserSerializer(read_only=True)
+    category = CategorySerializer(read_only=True)
+    amenities = AmenitySerializer(read_only=True, many=True)
     class Meta:
         model = Room
         fields = (
@@ -58,13 +69,22 @@ class RoomListSerializer(ModelSerializer):
             "price",
             "rating",
             "is_owner",
+            "is_liked",
             "photos",
+            "owner",
+            "category",
+            "amenities",
         )
+        # only sent with ?include=
+        optional_fields = ("owner", "category", "amenities")
     def get_rating(self, room):
         return room.rating()
     
     def get_is_owner(self, room):
         request = self.context.get("request")
         if request:
-            return room.owner == request.user
-        return False
\ No newline at end of file
+            return room.owner_id == request.user.pk
+        return False
+    
+    def get_is_liked(self, room):
+        return room.pk in get_liked(self.context.get("request"))["room"]
@@ -0,0 +1,69 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from categories.models import Category
+from common.detail import invalidate_detail, invalidate_details, shows_user
+from medias.models import Photo
+from reviews.models import Review
+from users.models import User
+from .facets import invalidate_facets
+from .models import Amenity, Room
+
+
+def invalidate_room(pk):
+    transaction.on_commit(lambda: invalidate_detail("room", pk))
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_delete, sender=Amenity)
+@receiver(post_delete, sender=Category)
+def room_facets_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_facets)
+
+
+@receiver(m2m_changed, sender=Room.amenities.through)
+def room_amenities_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    transaction.on_commit(invalidate_facets)
+    if not reverse:
+        invalidate_room(instance.pk)
+    elif pk_set:
+        for pk in pk_set:
+            invalidate_room(pk)
+    else:
+        # amenity.rooms.clear() does not say which rooms lost it
+        transaction.on_commit(lambda: invalidate_detail("room"))
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def room_changed(sender, instance, **kwargs):
+    invalidate_room(instance.pk)
+
+
+@receiver(post_save, sender=Photo)
+@receiver(post_delete, sender=Photo)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def room_child_changed(sender, instance, **kwargs):
+    if instance.room_id:
+        invalidate_room(instance.room_id)
+
+
+@receiver(post_save, sender=User)
+def room_owner_changed(sender, instance, created, update_fields, **kwargs):
+    # logins only touch last_login
+    if shows_user(created, update_fields):
+        pks = list(instance.rooms.values_list("pk", flat=True))
+        transaction.on_commit(lambda: invalidate_details("room", pks))
+
+
+@receiver(post_save, sender=Amenity)
+@receiver(post_delete, sender=Amenity)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def room_relation_changed(sender, **kwargs):
+    # shared by many rooms, drop every cached detail
+    transaction.on_commit(lambda: invalidate_detail("room"))
@@ -1,6 +1,18 @@
 from rest_framework.test import APITestCase
 from . import models
 from users.models import User
+from reviews.models import Review
+from medias.models import Photo
+from categories.models import Category
+from bookings.models import Booking
+from datetime import date, timedelta
+import base64
+from django.core.cache import cache
+from django.utils import timezone
+from django.http import QueryDict
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from .filters import filter_rooms, get_ordering
 import string, random
 class TestAmenities(APITestCase):
     NAME = "Amenity Test"
@@ -84,6 +96,7 @@ class TestRoom(APITestCase):
         user.set_password("123")
         user.save()
         self.user = user
+        self.category = Category.objects.create(name="Stay", kind=Category.CategoryKindChoices.ROOMS)
 
     def test_create_room(self):
         response = self.client.post("/api/v1/rooms/")
@@ -91,4 +104,750 @@ class TestRoom(APITestCase):
 
         self.client.force_login(self.user)
         response = self.client.post("/api/v1/rooms/")
-        self.assertEqual(response.status_code, 400)
\ No newline at end of file
+        self.assertEqual(response.status_code, 400)
+
+    def room_data(self, amenities):
+        return {
+            "name": "Room",
+            "country": "Korea",
+            "city": "Seoul",
+            "price": 100,
+            "rooms": 1,
+            "toilets": 1,
+            "description": "desc",
+            "address": "addr",
+            "kind": models.Room.RoomKindChoices.ENTIRE_PLACE,
+            "category": self.category.pk,
+            "amenities": amenities,
+        }
+
+    def test_create_room_with_amenities(self):
+        self.client.force_login(self.user)
+        amenities = [models.Amenity.objects.create(name=f"Amenity {index}").pk for index in range(5)]
+        response = self.client.post("/api/v1/rooms/", self.room_data(amenities), format="json")
+        self.assertEqual(response.status_code, 200)
+        room = models.Room.objects.get(pk=response.json()["id"])
+        self.assertEqual(sorted(room.amenities.values_list("pk", flat=True)), amenities)
+
+    def test_missing_amenities_reported_together(self):
+        self.client.force_login(self.user)
+        amenity = models.Amenity.objects.create(name="Wifi")
+        response = self.client.post("/api/v1/rooms/", self.room_data([amenity.pk, 998, 999]), format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("998, 999", response.json()["detail"])
+        self.assertFalse(models.Room.objects.exists())
+
+    def test_update_amenities_as_diff(self):
+        self.client.force_login(self.user)
+        amenities = [models.Amenity.objects.create(name=f"Amenity {index}").pk for index in range(20)]
+        response = self.client.post("/api/v1/rooms/", self.room_data(amenities[:10]), format="json")
+        url = f"/api/v1/rooms/{response.json()['id']}"
+        response = self.client.put(url, {"amenities": amenities[5:15]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        room = models.Room.objects.get(pk=response.json()["id"])
+        self.assertEqual(sorted(room.amenities.values_list("pk", flat=True)), amenities[5:15])
+        # one delete and one insert on the links, however many of them change
+        through = models.Room.amenities.through
+        kept = list(through.objects.filter(room=room, amenity__in=amenities[5:8]).order_by("pk").values_list("pk", flat=True))
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.put(url, {"amenities": amenities[3:8]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(room.amenities.values_list("pk", flat=True)), amenities[3:8])
+        writes = [
+            query["sql"].split()[0]
+            for query in context.captured_queries
+            if through._meta.db_table in query["sql"] and not query["sql"].startswith("SELECT")
+        ]
+        self.assertEqual(writes, ["DELETE", "INSERT"])
+        # links that stay are left alone rather than re-created
+        self.assertEqual(
+            list(through.objects.filter(room=room, amenity__in=amenities[5:8]).order_by("pk").values_list("pk", flat=True)),
+            kept,
+        )
+
+
+class TestRoomRating(APITestCase):
+    URL = "/api/v1/rooms/"
+
+    def setUp(self):
+        self.user = User.objects.create(username="host")
+        for index in range(3):
+            room = models.Room.objects.create(
+                name=f"Room {index}",
+                price=100,
+                rooms=1,
+                toilets=1,
+                description="desc",
+                address="addr",
+                kind=models.Room.RoomKindChoices.ENTIRE_PLACE,
+                owner=self.user,
+            )
+            for rating in range(1, index + 2):
+                Review.objects.create(user=self.user, room=room, payload="review", rating=rating)
+
+    def test_room_list_queries(self):
+        for room in models.Room.objects.all():
+            Photo.objects.create(room=room, file="https://example.com/photo.jpg", description="photo")
+        # rooms + prefetched photos, whatever the number of rooms
+        with self.assertNumQueries(2):
+            response = self.client.get(self.URL)
+        data = response.json()["results"]
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([room["rating"] for room in data], [2.0, 1.5, 1.0])
+        self.assertEqual([len(room["photos"]) for room in data], [1, 1, 1])
+        models.Room.objects.filter(name="Room 0").delete()
+        with self.assertNumQueries(2):
+            self.client.get(self.URL)
+
+    def test_sparse_fields(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        # no photos prefetch and no liked rooms lookup, only session, user and rooms
+        with self.assertNumQueries(3):
+            response = self.client.get(self.URL, {"fields": "pk,name,rating"})
+        self.assertEqual(set(response.json()["results"][0]), {"pk", "name", "rating"})
+        models.Room.objects.get(name="Room 0").amenities.add(models.Amenity.objects.create(name="Wifi"))
+        # rooms joined with owner, photos, amenities, liked rooms
+        with self.assertNumQueries(2 + 4):
+            response = self.client.get(self.URL, {"include": "owner,amenities"})
+        room = response.json()["results"][-1]
+        self.assertEqual(room["owner"]["username"], "host")
+        self.assertEqual([amenity["name"] for amenity in room["amenities"]], ["Wifi"])
+        self.assertNotIn("category", room)
+        for params in ({"fields": "name,secret"}, {"include": "price"}):
+            self.assertEqual(self.client.get(self.URL, params).status_code, 400)
+
+    def test_sparse_detail(self):
+        room = models.Room.objects.first()
+        self.client.force_login(self.user)
+        data = self.client.get(f"{self.URL}{room.pk}", {"fields": "name,is_owner"}).json()
+        self.assertEqual(data, {"name": room.name, "is_owner": True})
+        self.assertEqual(self.client.get(f"{self.URL}{room.pk}", {"include": "owner"}).status_code, 400)
+
+    def test_detail_hides_aggregates(self):
+        cache.clear()
+        room = models.Room.objects.get(name="Room 1")
+        data = self.client.get(f"{self.URL}{room.pk}").json()
+        self.assertEqual(data["rating"], 1.5)
+        self.assertFalse({"review_count", "rating_sum", "rating_avg", "star_1", "recent_reviews"} & set(data))
+
+    def test_is_owner(self):
+        self.assertFalse(any(room["is_owner"] for room in self.client.get(self.URL).json()["results"]))
+        self.client.force_login(self.user)
+        self.assertTrue(all(room["is_owner"] for room in self.client.get(self.URL).json()["results"]))
+
+
+class TestRoomPagination(APITestCase):
+    URL = "/api/v1/rooms/"
+
+    def setUp(self):
+        user = User.objects.create(username="host")
+        for index in range(7):
+            models.Room.objects.create(
+                name=f"Room {index}",
+                price=100,
+                rooms=1,
+                toilets=1,
+                description="desc",
+                address="addr",
+                kind=models.Room.RoomKindChoices.ENTIRE_PLACE,
+                owner=user,
+            )
+        # rooms sharing a timestamp are ordered by pk
+        models.Room.objects.filter(name__in=["Room 2", "Room 3", "Room 4"]).update(
+            created_at=models.Room.objects.get(name="Room 2").created_at
+        )
+
+    def test_walk_pages(self):
+        names = []
+        url = self.URL
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertLessEqual(len(data["results"]), 3)
+            names += [room["name"] for room in data["results"]]
+            url = data["next"]
+        self.assertEqual(names, [f"Room {index}" for index in reversed(range(7))])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.URL, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_stream(self):
+        import json
+        from common.streaming import stream_json
+        from .serializers import RoomListSerializer
+        response = self.client.get(self.URL, {"stream": "true"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([room["name"] for room in data], [f"Room {index}" for index in reversed(range(7))])
+        # one rooms query, photos prefetched once per chunk
+        rooms = RoomListSerializer.optimize(models.Room.objects.order_by("-created_at", "-pk"), None)
+        with self.assertNumQueries(1 + 3):
+            content = b"".join(stream_json(rooms, RoomListSerializer, chunk_size=3).streaming_content)
+        self.assertEqual(json.loads(content), data)
+        models.Room.objects.all().delete()
+        self.assertEqual(b"".join(self.client.get(self.URL, {"stream": "true"}).streaming_content), b"[]")
+
+
+class TestRoomSearch(APITestCase):
+    URL = "/api/v1/rooms/search"
+
+    def create_room(self, name, **kwargs):
+        fields = {
+            "price": 100,
+            "rooms": 1,
+            "toilets": 1,
+            "description": "desc",
+            "address": "addr",
+            "kind": models.Room.RoomKindChoices.ENTIRE_PLACE,
+            "owner": self.user,
+        }
+        fields.update(kwargs)
+        return models.Room.objects.create(name=name, **fields)
+
+    def setUp(self):
+        self.user = User.objects.create(username="host")
+        self.wifi = models.Amenity.objects.create(name="Wifi")
+        self.pool = models.Amenity.objects.create(name="Pool")
+        self.create_room("Cheap", city="부산", price=50).amenities.add(self.wifi)
+        self.create_room("Middle", city="부산", price=150, pet_friendly=False).amenities.add(self.wifi, self.pool)
+        self.create_room("Pricey", price=300, rooms=3, kind=models.Room.RoomKindChoices.PRIVATE_ROOM)
+
+    def search(self, **params):
+        response = self.client.get(self.URL, params)
+        self.assertEqual(response.status_code, 200)
+        return [room["name"] for room in response.json()["results"]]
+
+    def test_filters(self):
+        self.assertEqual(self.search(city="부산", sort="price"), ["Cheap", "Middle"])
+        self.assertEqual(self.search(min_price=100, sort="-price"), ["Pricey", "Middle"])
+        self.assertEqual(self.search(kind="private_room"), ["Pricey"])
+        self.assertEqual(self.search(rooms=2), ["Pricey"])
+        self.assertEqual(self.search(pet_friendly="false"), ["Middle"])
+        self.assertEqual(self.search(amenities=f"{self.wifi.pk},{self.pool.pk}"), ["Middle"])
+        self.assertEqual(self.search(amenities=str(self.wifi.pk), sort="price"), ["Cheap", "Middle"])
+
+    def test_invalid_params(self):
+        for params in ({"sort": "name"}, {"kind": "castle"}, {"min_price": "cheap"}):
+            response = self.client.get(self.URL, params)
+            self.assertEqual(response.status_code, 400)
+
+    def explain(self, query):
+        params = QueryDict(query)
+        rooms = filter_rooms(models.Room.objects.all(), params).order_by(*get_ordering(params))
+        return rooms.explain()
+
+    def test_hot_filters_use_indexes(self):
+        hot = {
+            "city=서울&sort=price": "room_city_price_idx",
+            "country=한국&city=서울&sort=price": "room_country_city_price_idx",
+            "kind=entire_place&sort=price": "room_kind_price_idx",
+            "category=1&sort=price": "room_category_price_idx",
+            "sort=price": "room_price_idx",
+            "sort=rating": "room_rating_idx",
+            "sort=newest": "room_created_idx",
+        }
+        for query, index in hot.items():
+            plan = self.explain(query)
+            self.assertIn(index, plan, query)
+            self.assertNotIn("TEMP B-TREE", plan, query)
+
+
+class TestRoomAvailability(TestRoomSearch):
+    URL = "/api/v1/rooms/available"
+
+    def setUp(self):
+        super().setUp()
+        Booking.objects.create(
+            kind=Booking.BookingKindChoices.ROOM,
+            user=self.user,
+            room=models.Room.objects.get(name="Cheap"),
+            check_in=date(2030, 1, 10),
+            check_out=date(2030, 1, 15),
+            guests=1,
+        )
+
+    def test_filters(self):
+        stay = {"check_in": "2030-01-12", "check_out": "2030-01-20"}
+        self.assertEqual(self.search(sort="price", **stay), ["Middle", "Pricey"])
+        self.assertEqual(self.search(city="부산", **stay), ["Middle"])
+        stay = {"check_in": "2030-01-16", "check_out": "2030-01-20"}
+        self.assertEqual(self.search(city="부산", sort="price", **stay), ["Cheap", "Middle"])
+
+    def test_invalid_params(self):
+        for params in ({}, {"check_in": "2030-01-12"}, {"check_in": "2030-01-12", "check_out": "2030-01-11"}):
+            response = self.client.get(self.URL, params)
+            self.assertEqual(response.status_code, 400)
+
+    def test_hot_filters_use_indexes(self):
+        plan = models.Room.objects.available(date(2030, 1, 12), date(2030, 1, 20)).explain()
+        self.assertIn("booking_room_dates_idx", plan)
+
+
+class TestRoomCalendar(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="host")
+        self.room = models.Room.objects.create(
+            name="Room",
+            price=100,
+            rooms=1,
+            toilets=1,
+            description="desc",
+            address="addr",
+            kind=models.Room.RoomKindChoices.ENTIRE_PLACE,
+            owner=self.user,
+        )
+        self.url = f"/api/v1/rooms/{self.room.pk}/calendar"
+        self.today = timezone.localtime(timezone.now()).date()
+
+    def book(self, check_in, check_out):
+        return Booking.objects.create(
+            kind=Booking.BookingKindChoices.ROOM,
+            user=self.user,
+            room=self.room,
+            check_in=self.today + timedelta(days=check_in),
+            check_out=self.today + timedelta(days=check_out),
+            guests=1,
+        )
+
+    def booked_days(self, data):
+        bitmap = base64.b64decode(data["bitmap"])
+        return [day for day in range(data["days"]) if bitmap[day // 8] >> (day % 8) & 1]
+
+    def test_bitmap(self):
+        self.book(-2, 1)
+        self.book(9, 11)
+        response = self.client.get(self.url, {"months": 1})
+        data = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data["start"], self.today.isoformat())
+        self.assertEqual(self.booked_days(data), [0, 9, 10])
+        self.assertEqual(len(data["bitmap"]), len(base64.b64encode(bytes((data["days"] + 7) // 8))))
+
+    def test_cached_until_booking_changes(self):
+        self.client.get(self.url)
+        # only the room lookup, the bitmap comes from the cache
+        with self.assertNumQueries(1):
+            data = self.client.get(self.url).json()
+        self.assertEqual(self.booked_days(data), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.book(3, 5)
+        self.assertEqual(self.booked_days(self.client.get(self.url).json()), [3, 4])
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.delete()
+        self.assertEqual(self.booked_days(self.client.get(self.url).json()), [])
+
+    def test_invalid_months(self):
+        for months in ("0", "13", "year"):
+            response = self.client.get(self.url, {"months": months})
+            self.assertEqual(response.status_code, 400)
+
+
+class TestRoomImport(APITestCase):
+    URL = "/api/v1/rooms/import"
+
+    def setUp(self):
+        self.user = User.objects.create(username="partner")
+        self.category = Category.objects.create(name="Stay", kind=Category.CategoryKindChoices.ROOMS)
+        self.amenities = [models.Amenity.objects.create(name=f"Amenity {index}").pk for index in range(3)]
+
+    def row(self, index, **extra):
+        return {
+            "name": f"Imported {index}",
+            "price": 100 + index,
+            "rooms": 1,
+            "toilets": 1,
+            "description": "desc",
+            "address": "addr",
+            "kind": models.Room.RoomKindChoices.PRIVATE_ROOM,
+            "category": self.category.pk,
+            "amenities": self.amenities[:2],
+            "photos": [{"file": "https://example.com/photo.jpg", "description": "photo"}],
+            **extra,
+        }
+
+    def upload(self, name, content):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        import json
+        response = self.client.post(self.URL, {"file": SimpleUploadedFile(name, content.encode())})
+        reports = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        return response, reports
+
+    def test_login_required(self):
+        response = self.client.post(self.URL)
+        self.assertEqual(response.status_code, 403)
+
+    def test_import_jsonl(self):
+        import json
+        from .importer import import_rooms, read_rows
+        self.client.force_login(self.user)
+        rows = [self.row(index) for index in range(5)]
+        rows.insert(2, self.row(99, price=-1))
+        rows.insert(4, self.row(98, amenities=[self.amenities[0], 999]))
+        content = "\n".join(json.dumps(row) for row in rows) + "\nnot json\n"
+        response, reports = self.upload("rooms.jsonl", content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(reports[-1]["created"], 5)
+        self.assertEqual([error["line"] for error in reports[-1]["errors"]], [3, 5, 8])
+        self.assertIn("999", reports[-1]["errors"][1]["errors"]["amenities"])
+        self.assertEqual(models.Room.objects.filter(owner=self.user).count(), 5)
+        self.assertEqual(models.Room.amenities.through.objects.count(), 10)
+        self.assertEqual(Photo.objects.filter(room__owner=self.user).count(), 5)
+        # imported rooms are searchable
+        data = self.client.get("/api/v1/search/", {"q": "imported"}).json()
+        self.assertEqual(len(data["rooms"]), 5)
+        # writes are batched per chunk, not per row
+        lines = (json.dumps(self.row(index)) for index in range(40))
+        # categories, then per chunk: amenities, savepoint, rooms, links, photos, index, release
+        with self.assertNumQueries(1 + 2 * 7):
+            reports = list(import_rooms(read_rows(lines, "jsonl"), self.user, chunk_size=20))
+        self.assertEqual([report["created"] for report in reports], [20, 40])
+
+    def test_import_csv(self):
+        self.client.force_login(self.user)
+        content = (
+            "name,price,rooms,toilets,description,address,kind,category,amenities,photos\n"
+            f"Csv room,80,2,1,desc,addr,shared_room,{self.category.pk},{self.amenities[0]};{self.amenities[2]},"
+            "https://example.com/a.jpg;https://example.com/b.jpg\n"
+            f"Bad room,80,2,1,desc,addr,castle,{self.category.pk},,\n"
+        )
+        response, reports = self.upload("rooms.csv", content)
+        self.assertEqual(reports[-1]["created"], 1)
+        self.assertEqual(reports[-1]["errors"][0]["line"], 3)
+        room = models.Room.objects.get(name="Csv room")
+        self.assertEqual(sorted(room.amenities.values_list("pk", flat=True)), [self.amenities[0], self.amenities[2]])
+        self.assertEqual(room.photos.count(), 2)
+
+    def test_invalid_format(self):
+        self.client.force_login(self.user)
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        response = self.client.post(self.URL, {"file": SimpleUploadedFile("rooms.xml", b"<rooms/>")})
+        self.assertEqual(response.status_code, 400)
+
+    def test_import_command(self):
+        import io, json, os, tempfile
+        from django.core.management import call_command
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as file:
+            file.write("\n".join(json.dumps(self.row(index)) for index in range(3)))
+        self.addCleanup(os.remove, file.name)
+        out = io.StringIO()
+        call_command("import_rooms", file.name, owner="partner", stdout=out)
+        self.assertIn("Imported 3 rooms, 0 rows failed", out.getvalue())
+        self.assertEqual(models.Room.objects.count(), 3)
+
+    def test_unreadable_file(self):
+        import io, json, os, tempfile
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.core.management import CommandError, call_command
+        self.client.force_login(self.user)
+        # latin-1, not utf-8
+        content = (json.dumps(self.row(0, name="Café"), ensure_ascii=False) + "\n").encode("latin-1")
+        response = self.client.post(self.URL, {"file": SimpleUploadedFile("rooms.jsonl", content)})
+        self.assertEqual(response.status_code, 200)
+        reports = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertTrue(reports[-1]["aborted"])
+        self.assertIn("Unreadable line", reports[-1]["errors"][0]["errors"])
+        with tempfile.NamedTemporaryFile("wb", suffix=".jsonl", delete=False) as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        with self.assertRaises(CommandError):
+            call_command("import_rooms", file.name, owner="partner", stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertFalse(models.Room.objects.exists())
+
+
+class TestRoomFacets(APITestCase):
+    URL = "/api/v1/rooms/facets"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="host")
+        self.category = Category.objects.create(name="Stay", kind=Category.CategoryKindChoices.ROOMS)
+        self.wifi = models.Amenity.objects.create(name="Wifi")
+        for city, price, kind in (
+            ("Seoul", 40, models.Room.RoomKindChoices.ENTIRE_PLACE),
+            ("Seoul", 120, models.Room.RoomKindChoices.PRIVATE_ROOM),
+            ("Busan", 120, models.Room.RoomKindChoices.ENTIRE_PLACE),
+            ("Busan", 900, models.Room.RoomKindChoices.ENTIRE_PLACE),
+        ):
+            self.create_room(city, price, kind)
+
+    def create_room(self, city, price, kind):
+        room = models.Room.objects.create(
+            name=city,
+            city=city,
+            price=price,
+            rooms=1,
+            toilets=1,
+            description="desc",
+            address="addr",
+            kind=kind,
+            owner=self.user,
+            category=self.category if price > 100 else None,
+        )
+        if price > 100:
+            room.amenities.add(self.wifi)
+        return room
+
+    def facet(self, data, name):
+        return {row["value"]: row["count"] for row in data[name]}
+
+    def test_facets(self):
+        data = self.client.get(self.URL).json()
+        self.assertEqual(self.facet(data, "city"), {"Seoul": 2, "Busan": 2})
+        self.assertEqual(self.facet(data, "kind"), {"entire_place": 3, "private_room": 1})
+        self.assertEqual(self.facet(data, "category"), {self.category.pk: 3, None: 1})
+        self.assertEqual(self.facet(data, "price"), {"0-50": 1, "100-200": 2, "500+": 1})
+        self.assertEqual(self.facet(data, "amenities"), {self.wifi.pk: 3})
+        data = self.client.get(self.URL, {"city": "Busan"}).json()
+        self.assertEqual(self.facet(data, "price"), {"100-200": 1, "500+": 1})
+        self.assertEqual(self.facet(data, "amenities"), {self.wifi.pk: 2})
+
+    def test_two_queries(self):
+        with self.assertNumQueries(2):
+            self.client.get(self.URL, {"kind": "entire_place"})
+
+    def test_unfiltered_cached_until_rooms_change(self):
+        self.client.get(self.URL)
+        with self.assertNumQueries(0):
+            self.client.get(self.URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            room = self.create_room("Jeju", 60, models.Room.RoomKindChoices.SHARED_ROOM)
+        self.assertEqual(self.facet(self.client.get(self.URL).json(), "city")["Jeju"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            room.amenities.add(self.wifi)
+        self.assertEqual(self.facet(self.client.get(self.URL).json(), "amenities"), {self.wifi.pk: 4})
+        with self.captureOnCommitCallbacks(execute=True):
+            room.delete()
+        self.assertNotIn("Jeju", self.facet(self.client.get(self.URL).json(), "city"))
+
+
+class TestRoomDetailCache(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create(username="host")
+        self.guest = User.objects.create(username="guest")
+        self.wifi = models.Amenity.objects.create(name="Wifi")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room = models.Room.objects.create(
+                name="Room",
+                price=100,
+                rooms=1,
+                toilets=1,
+                description="desc",
+                address="addr",
+                kind=models.Room.RoomKindChoices.ENTIRE_PLACE,
+                owner=self.owner,
+            )
+            self.room.amenities.add(self.wifi)
+        self.url = f"/api/v1/rooms/{self.room.pk}"
+
+    def get(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.get(self.url).json()
+
+    def check_invalidation(self):
+        data = self.get()
+        self.assertEqual(data["amenities"][0]["name"], "Wifi")
+        # the payload comes from the cache
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Photo.objects.create(room=self.room, file="https://example.com/photo.jpg", description="photo")
+        self.assertEqual(len(self.get()["photos"]), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(user=self.guest, room=self.room, payload="review", rating=4)
+        self.assertEqual(self.get()["rating"], 4.0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.wifi.name = "Fast wifi"
+            self.wifi.save()
+        self.assertEqual(self.get()["amenities"][0]["name"], "Fast wifi")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.amenities.clear()
+        self.assertEqual(self.get()["amenities"], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner.name = "Host"
+            self.owner.save()
+        self.assertEqual(self.get()["owner"]["name"], "Host")
+        # a login does not change what the detail shows
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner.save(update_fields=["last_login"])
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_invalidation(self):
+        self.check_invalidation()
+
+    def test_file_based_cache(self):
+        import tempfile
+        from django.test import override_settings
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(CACHES={"default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": location,
+            }}):
+                self.check_invalidation()
+
+    def test_viewer_fields(self):
+        from wishlists.models import Wishlist
+        self.assertFalse(self.get()["is_owner"])
+        self.client.force_login(self.owner)
+        data = self.get()
+        self.assertTrue(data["is_owner"])
+        self.assertFalse(data["is_liked"])
+        self.client.force_login(self.guest)
+        with self.captureOnCommitCallbacks(execute=True):
+            Wishlist.objects.create(name="Trip", user=self.guest).rooms.add(self.room)
+        data = self.get()
+        self.assertFalse(data["is_owner"])
+        self.assertTrue(data["is_liked"])
+
+    def test_conditional_get(self):
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+        # another representation of the room has its own etag
+        response = self.client.get(self.url, {"fields": "name"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"name": "Room"})
+        response = self.client.get(self.url, {"fields": "name,name"}, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        # child objects change the etag
+        with self.captureOnCommitCallbacks(execute=True):
+            Photo.objects.create(room=self.room, file="https://example.com/photo.jpg", description="photo")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        # and so does the viewer
+        self.client.force_login(self.guest)
+        response = self.client.get(self.url)
+        self.assertFalse(response.has_header("Last-Modified"))
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        from wishlists.models import Wishlist
+        Wishlist.objects.create(name="Trip", user=self.guest).rooms.add(self.room)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class TestRoomAdmin(APITestCase):
+    URL = "/admin/rooms/room/"
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(username="admin", password="123")
+        self.client.force_login(self.admin)
+
+    def add_rooms(self, count):
+        wifi, _ = models.Amenity.objects.get_or_create(name="Wifi")
+        for index in range(count):
+            owner = User.objects.create(username=f"owner {models.Room.objects.count()}")
+            room = models.Room.objects.create(
+                name=f"Room {index}",
+                price=100,
+                rooms=1,
+                toilets=1,
+                description="desc",
+                address="addr",
+                kind=models.Room.RoomKindChoices.ENTIRE_PLACE,
+                owner=owner,
+            )
+            room.amenities.add(wifi)
+            Review.objects.create(user=owner, room=room, payload="review", rating=index % 5 + 1)
+
+    def count_queries(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_changelists_do_not_query_per_row(self):
+        from direct_messages.models import ChattingRoom, Message
+        urls = (self.URL, "/admin/reviews/review/", "/admin/direct_messages/message/")
+        self.add_rooms(2)
+        chat = ChattingRoom.objects.create()
+        Message.objects.create(text="hi", user=self.admin, room=chat)
+        counts = [self.count_queries(url) for url in urls]
+        self.add_rooms(10)
+        for index in range(10):
+            Message.objects.create(text="hi", user=self.admin, room=ChattingRoom.objects.create())
+        self.assertEqual([self.count_queries(url) for url in urls], counts)
+
+    def test_sortable_columns(self):
+        self.add_rooms(3)
+        models.Room.objects.get(name="Room 0").amenities.add(models.Amenity.objects.create(name="Pool"))
+        # columns 4 and 5 of list_display, descending
+        response = self.client.get(self.URL, {"o": "-4"})
+        self.assertEqual(response.context["cl"].result_list[0].name, "Room 0")
+        response = self.client.get(self.URL, {"o": "-5"})
+        self.assertEqual(response.context["cl"].result_list[0].name, "Room 2")
+
+    def run_action(self, action, value=""):
+        rooms = models.Room.objects.order_by("pk")
+        data = {
+            "action": action,
+            "index": 0,
+            "value": value,
+            "_selected_action": [room.pk for room in rooms],
+        }
+        return self.client.post(self.URL, data, follow=True)
+
+    def prices(self):
+        return list(models.Room.objects.order_by("pk").values_list("price", flat=True))
+
+    def test_price_actions(self):
+        self.add_rooms(3)
+        models.Room.objects.filter(name="Room 1").update(price=149)
+        models.Room.objects.filter(name="Room 2").update(price=37)
+        # one update, whatever the number of selected rooms
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as context:
+            response = self.run_action("adjust_prices", "10")
+        self.assertEqual(len([query for query in context.captured_queries if query["sql"].startswith("UPDATE")]), 1)
+        self.assertContains(response, "3 rooms updated.")
+        self.assertEqual(self.prices(), [110, 164, 41])
+        self.run_action("round_prices", "50")
+        self.assertEqual(self.prices(), [100, 150, 50])
+        self.run_action("adjust_prices", "-100")
+        self.assertEqual(self.prices(), [0, 0, 0])
+        self.run_action("set_prices", "80")
+        self.assertEqual(self.prices(), [80, 80, 80])
+        self.run_action("reset_prices")
+        self.assertEqual(self.prices(), [0, 0, 0])
+
+    def test_invalid_value(self):
+        self.add_rooms(1)
+        for action, value in (("set_prices", ""), ("adjust_prices", "-101"), ("round_prices", "0")):
+            response = self.run_action(action, value)
+            self.assertContains(response, "Enter a value of at least")
+        self.assertEqual(self.prices(), [100])
+
+    def test_toggle_pet_friendly(self):
+        self.add_rooms(2)
+        models.Room.objects.filter(name="Room 0").update(pet_friendly=False)
+        before = models.Room.objects.get(name="Room 1").updated_at
+        url = f"/api/v1/rooms/{models.Room.objects.get(name='Room 1').pk}"
+        self.assertTrue(self.client.get(url).json()["pet_friendly"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.run_action("toggle_pet_friendly")
+        # the cached detail is invalidated as with a save()
+        self.assertFalse(self.client.get(url).json()["pet_friendly"])
+        rooms = models.Room.objects.order_by("pk")
+        self.assertEqual([room.pet_friendly for room in rooms], [True, False])
+        self.assertGreater(rooms[1].updated_at, before)
+
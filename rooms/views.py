@@ -1,19 +1,36 @@
+import io
+import json
+import os
 import time
 from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.db import transaction
+from django.db.models import Count, Q
 from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.exceptions import NotFound, ParseError, PermissionDenied
 from rest_framework.status import HTTP_204_NO_CONTENT, HTTP_400_BAD_REQUEST
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from common.pagination import KeysetPagination
+from common.conditional import conditional
+from common.detail import detail_etag, detail_last_modified, get_detail
+from common.serializers import fields_key
+from common.relations import resolve_pks
+from common.streaming import stream_json, wants_stream
 from .models import Amenity, Room
 from . import serializers
+from .calendar import get_calendar
+from .importer import FORMATS, import_rooms, read_rows
+from .facets import get_facets
+from .filters import filter_rooms, get_ordering, get_stay, is_filtered
 from categories.models import Category
+from reviews.aggregates import get_summary
 from reviews.serializers import ReviewSerializer
 from medias.serializers import PhotoSerializer
-from bookings.models import Booking
-from bookings.serializers import PublicBookingSerializer, CreateRoomBookingSerializer
+from bookings.models import Booking, BookedNight
+from wishlists.liked import get_liked
+from bookings.serializers import PublicBookingSerializer, CreateRoomBookingSerializer, BookingCheckSerializer
 class Amenities(APIView):
     def get(self, request):
         all_amenities = Amenity.objects.all()
@@ -65,9 +82,14 @@ class Rooms(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get(self, request):
-        all_rooms = Room.objects.all()
-        serializer = serializers.RoomListSerializer(all_rooms, many=True, context={'request': request})
-        return Response(serializer.data)
+        if wants_stream(request):
+            rooms = serializers.RoomListSerializer.optimize(Room.objects.order_by("-created_at", "-pk"), request)
+            return stream_json(rooms, serializers.RoomListSerializer, {"request": request})
+        paginator = KeysetPagination()
+        rooms = serializers.RoomListSerializer.optimize(Room.objects.all(), request)
+        rooms = paginator.paginate_queryset(rooms, request)
+        serializer = serializers.RoomListSerializer(rooms, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         serializer = serializers.RoomDetailSerializer(data = request.data)
@@ -79,22 +101,50 @@ class Rooms(APIView):
                 category = Category.objects.get(pk=category_pk)
                 if category.kind == Category.CategoryKindChoices.EXPERIENCES:
                     raise ParseError("The category kind should be 'rooms'.")
-            except category.DoesNotExist:
+            except Category.DoesNotExist:
                 raise ParseError("Category not found.")
-            try:
-                with transaction.atomic():
-                    room = serializer.save(owner=request.user, category=category)
-                    amenities = request.data.get('amenities')
-                    for amenity_pk in amenities:
-                        amenity = Amenity.objects.get(pk=amenity_pk)
-                        room.amenities.add(amenity)
-                    serializer = serializers.RoomDetailSerializer(room, context={"request": request})
-                    return Response(serializer.data)
-            except Exception:
-                raise ParseError("Amenity not found")
+            amenities = resolve_pks(Amenity, request.data.get("amenities", []))
+            with transaction.atomic():
+                room = serializer.save(owner=request.user, category=category)
+                room.amenities.set(amenities)
+            serializer = serializers.RoomDetailSerializer(room, context={"request": request})
+            return Response(serializer.data)
         else:
             return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
-           
+
+class RoomSearch(APIView):
+
+    def get_rooms(self, request):
+        rooms = serializers.RoomListSerializer.optimize(Room.objects.all(), request)
+        return filter_rooms(rooms, request.query_params)
+
+    def get(self, request):
+        rooms = self.get_rooms(request)
+        paginator = KeysetPagination(ordering=get_ordering(request.query_params))
+        rooms = paginator.paginate_queryset(rooms, request)
+        serializer = serializers.RoomListSerializer(rooms, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data)
+
+class RoomFacets(APIView):
+
+    def get(self, request):
+        rooms = filter_rooms(Room.objects.all(), request.query_params)
+        return Response(get_facets(rooms, is_filtered(request.query_params)))
+
+class RoomAvailable(RoomSearch):
+
+    def get_rooms(self, request):
+        check_in, check_out = get_stay(request.query_params)
+        return super().get_rooms(request).available(check_in, check_out)
+
+def room_etag(request, pk):
+    return detail_etag("room", pk, request.user.pk, pk in get_liked(request)["room"], *fields_key(request))
+
+def room_last_modified(request, pk):
+    # is_owner and is_liked are only covered by the etag
+    if not request.user.is_authenticated:
+        return detail_last_modified("room", pk)
+
 class RoomDetail(APIView):
 
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -105,10 +155,21 @@ class RoomDetail(APIView):
         except Room.DoesNotExist:
             raise NotFound
 
+    def get_detail_object(self, pk):
+        try:
+            return Room.objects.for_detail().get(pk=pk)
+        except Room.DoesNotExist:
+            raise NotFound
+
+    @conditional(etag_func=room_etag, last_modified_func=room_last_modified)
     def get(self, request, pk):
-        room = self.get_object(pk)
-        serializer = serializers.RoomDetailSerializer(room, context={"request": request})
-        return Response(serializer.data)
+        names = serializers.RoomDetailSerializer.requested_fields(request)
+        owner_pk, data = get_detail("room", pk, self.get_detail_object, serializers.RoomDetailSerializer, "owner_id")
+        if "is_owner" in names:
+            data["is_owner"] = owner_pk == request.user.pk
+        if "is_liked" in names:
+            data["is_liked"] = pk in get_liked(request)["room"]
+        return Response({name: value for name, value in data.items() if name in names})
     
     def put(self, request, pk):
         room = self.get_object(pk)
@@ -130,7 +191,10 @@ class RoomDetail(APIView):
                         raise ParseError("The category kind should be 'rooms'.")
                 except:
                     raise ParseError("Category not found.")
-                
+            #if request.data has amenities / if not: amenities will stay as they are
+            amenities = request.data.get("amenities")
+            if amenities is not None:
+                amenities = resolve_pks(Amenity, amenities)
             try:
                 with transaction.atomic():
                     if category_pk:
@@ -138,21 +202,11 @@ class RoomDetail(APIView):
                     # if there are no category modifications, save without category.
                     else:
                         room = serializer.save()
-                    amenities = request.data.get("amenities")
-                    #if request.data has amenities / empty array will pass "if".
-                    if amenities and amenities != []:
-                        # intialize room amenities to perform add
-                        room.amenities.clear()
-                        for amenity_pk in amenities:
-                            amenity = Amenity.objects.get(pk=amenity_pk)
-                            room.amenities.add(amenity)
-                    elif amenities == []:
-                        room.amenities.clear()
+                    if amenities is not None:
+                        # set() only deletes and inserts the links that changed
+                        room.amenities.set(amenities)
                     serializer = serializers.RoomDetailSerializer(room, context={"request": request})
                     return Response(serializer.data)
-            except Amenity.DoesNotExist:
-                # because of the transaction, the room will not change.
-                raise ParseError("Amenity not found.")
             except Exception as e:
                 raise ParseError(serializer.errors)
 
@@ -177,16 +231,12 @@ class RoomReviews(APIView):
             raise NotFound
 
     def get(self, request, pk):
-        try:
-            page = int(request.query_params.get('page', 1))
-        except ValueError:
-            page = 1
         room = self.get_object(pk)
-        page_size = settings.PAGE_SIZE
-        start = (page - 1) * page_size
-        end = start + page_size
-        serializer = ReviewSerializer(room.reviews.all()[start:end], many=True)
-        return Response(serializer.data)
+        paginator = KeysetPagination()
+        # walks the (room, created_at) index, whatever the depth of the page
+        reviews = paginator.paginate_queryset(room.reviews.select_related("user"), request)
+        serializer = ReviewSerializer(reviews, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request, pk):
         serializer = ReviewSerializer(data=request.data)
@@ -198,6 +248,17 @@ class RoomReviews(APIView):
             serializer = ReviewSerializer(review)
             return Response(serializer.data)
 
+class RoomReviewSummary(APIView):
+
+    def get(self, request, pk):
+        try:
+            room = Room.objects.get(pk=pk)
+        except Room.DoesNotExist:
+            raise NotFound
+        summary = get_summary(room)
+        summary["recent"] = ReviewSerializer(summary["recent"], many=True).data
+        return Response(summary)
+
 class RoomAmenities(APIView):
     def get_object(self, pk):
         try:
@@ -255,6 +316,8 @@ class RoomBookings(APIView):
                                           kind=Booking.BookingKindChoices.ROOM,
                                           check_in__gt=now,
                                           )
+        if wants_stream(request):
+            return stream_json(bookings.order_by("check_in", "pk"), PublicBookingSerializer)
         serializer = PublicBookingSerializer(bookings, many=True)
         return Response(serializer.data)
     
@@ -284,11 +347,82 @@ class RoomBookingCheck(APIView):
         room = self.get_object(pk)
         check_in = request.query_params.get("check_in")
         check_out = request.query_params.get('check_out')
-        exists = Booking.objects.filter(
+        exists = BookedNight.objects.filter(
             room=room,
-            check_in__lte=check_out,
-            check_out__gte=check_in,
+            night__gte=check_in,
+            night__lt=check_out,
             ).exists()
         if exists:
             return Response({"ok":False})
         return Response({"ok": True})
+
+class RoomBookingBatchCheck(APIView):
+
+    max_checks = 100
+
+    def post(self, request):
+        # rejected before validating a single check
+        if not isinstance(request.data, list):
+            raise ParseError("Expected a list of checks.")
+        if len(request.data) > self.max_checks:
+            raise ParseError(f"At most {self.max_checks} checks per request.")
+        serializer = BookingCheckSerializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
+        checks = serializer.validated_data
+        if not checks:
+            return Response([])
+        room_pks = {check["room"] for check in checks}
+        missing = room_pks - set(Room.objects.filter(pk__in=room_pks).values_list("pk", flat=True))
+        if missing:
+            raise NotFound(f"Room not found: {', '.join(str(pk) for pk in sorted(missing))}")
+        # one conditional count per check, all answered by a single query
+        overlaps = Booking.objects.filter(room__in=room_pks).aggregate(**{
+            f"check_{index}": Count("pk", filter=Q(
+                room=check["room"],
+                check_in__lt=check["check_out"],
+                check_out__gt=check["check_in"],
+            ))
+            for index, check in enumerate(checks)
+        })
+        return Response([
+            {**check, "ok": overlaps[f"check_{index}"] == 0}
+            for index, check in enumerate(checks)
+        ])
+
+class RoomCalendar(APIView):
+
+    def get_object(self, pk):
+        try:
+            return Room.objects.get(pk=pk)
+        except Room.DoesNotExist:
+            raise NotFound
+
+    def get(self, request, pk):
+        room = self.get_object(pk)
+        try:
+            months = int(request.query_params.get("months", 12))
+        except ValueError:
+            raise ParseError("'months' should be a number.")
+        if not 1 <= months <= 12:
+            raise ParseError("'months' should be between 1 and 12.")
+        return Response(get_calendar(room.pk, months))
+
+class RoomImport(APIView):
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        file = request.FILES.get("file")
+        if not file:
+            raise ParseError("A 'file' upload is required.")
+        format = request.data.get("format") or os.path.splitext(file.name)[1].lstrip(".").lower()
+        if format not in FORMATS:
+            raise ParseError(f"'format' should be one of {', '.join(FORMATS)}.")
+        lines = io.TextIOWrapper(file, encoding="utf-8", newline="")
+        reports = import_rooms(read_rows(lines, format), request.user)
+        # one json report per chunk, sent as soon as the chunk is written
+        return StreamingHttpResponse(
+            (json.dumps(report) + "\n" for report in reports),
+            content_type="application/x-ndjson",
+        )
@@ -0,0 +1,70 @@
+import re
+from django.db import connection
+
+# FTS5 shadow tables created by search/migrations/0001_initial.py,
+# keyed by rowid = pk of the indexed object.
+# columns are (model field, bm25 weight)
+TABLES = {
+    "room": ("search_room", (("name", 10.0), ("description", 1.0), ("address", 2.0))),
+    "experience": ("search_experience", (("name", 10.0), ("description", 1.0))),
+}
+
+WORD = re.compile(r"\w+")
+
+
+def index_objects(kind, objects):
+    table, columns = TABLES[kind]
+    names = [name for name, _ in columns]
+    sql = (
+        f"INSERT OR REPLACE INTO {table}(rowid, {', '.join(names)}) "
+        f"VALUES (%s, {', '.join(['%s'] * len(names))})"
+    )
+    rows = [[obj.pk] + [getattr(obj, name) for name in names] for obj in objects]
+    if rows:
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+
+def remove_object(kind, pk):
+    table, _ = TABLES[kind]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [pk])
+
+
+def rebuild(kind, queryset, chunk_size=2000):
+    table, columns = TABLES[kind]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table}")
+    fields = ["pk"] + [name for name, _ in columns]
+    chunk = []
+    count = 0
+    for obj in queryset.only(*fields).iterator(chunk_size=chunk_size):
+        chunk.append(obj)
+        if len(chunk) == chunk_size:
+            index_objects(kind, chunk)
+            count += len(chunk)
+            chunk = []
+    index_objects(kind, chunk)
+    return count + len(chunk)
+
+
+def match_expression(text):
+    # every word must match, as a prefix; FTS5 syntax in the input is dropped
+    words = WORD.findall(text)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search(kind, text, limit):
+    """ Return the pks matching text, best match first """
+    expression = match_expression(text)
+    if not expression:
+        return []
+    table, columns = TABLES[kind]
+    weights = ", ".join(str(weight) for _, weight in columns)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {table} WHERE {table} MATCH %s "
+            f"ORDER BY bm25({table}, {weights}) LIMIT %s",
+            [expression, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
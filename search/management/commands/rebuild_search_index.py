@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rooms.models import Room
+from experiences.models import Experience
+from search import index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of rooms and experiences"
+
+    def handle(self, *args, **options):
+        for kind, model in (("room", Room), ("experience", Experience)):
+            with transaction.atomic():
+                count = index.rebuild(kind, model.objects.all())
+            self.stdout.write(
+                self.style.SUCCESS(f"Indexed {count} {model._meta.verbose_name_plural}")
+            )
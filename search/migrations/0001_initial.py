@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('rooms', '0008_search_indexes'),
+        ('experiences', '0006_created_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE VIRTUAL TABLE search_room USING fts5(name, description, address, prefix='2 3')",
+            "DROP TABLE search_room",
+        ),
+        migrations.RunSQL(
+            "CREATE VIRTUAL TABLE search_experience USING fts5(name, description, prefix='2 3')",
+            "DROP TABLE search_experience",
+        ),
+        migrations.RunSQL(
+            "INSERT INTO search_room(rowid, name, description, address) "
+            "SELECT id, name, description, address FROM rooms_room",
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            "INSERT INTO search_experience(rowid, name, description) "
+            "SELECT id, name, description FROM experiences_experience",
+            migrations.RunSQL.noop,
+        ),
+    ]
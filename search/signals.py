@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rooms.models import Room
+from experiences.models import Experience
+from . import index
+
+
+@receiver(post_save, sender=Room)
+def index_room(sender, instance, **kwargs):
+    index.index_objects("room", [instance])
+
+
+@receiver(post_delete, sender=Room)
+def remove_room(sender, instance, **kwargs):
+    index.remove_object("room", instance.pk)
+
+
+@receiver(post_save, sender=Experience)
+def index_experience(sender, instance, **kwargs):
+    index.index_objects("experience", [instance])
+
+
+@receiver(post_delete, sender=Experience)
+def remove_experience(sender, instance, **kwargs):
+    index.remove_object("experience", instance.pk)
@@ -0,0 +1,77 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APITestCase
+from rooms.models import Room
+from experiences.models import Experience
+from users.models import User
+
+
+class TestSearch(APITestCase):
+    URL = "/api/v1/search/"
+
+    def create_room(self, name, description="desc", address="addr"):
+        return Room.objects.create(
+            name=name,
+            price=100,
+            rooms=1,
+            toilets=1,
+            description=description,
+            address=address,
+            kind=Room.RoomKindChoices.ENTIRE_PLACE,
+            owner=self.user,
+        )
+
+    def setUp(self):
+        self.user = User.objects.create(username="host")
+        self.create_room("Quiet cabin", description="A cabin by the lake")
+        self.create_room("Lake house", description="Sunny rooms", address="Lake road")
+        self.create_room("City loft", description="Close to the station")
+        Experience.objects.create(
+            name="Lake kayaking",
+            host=self.user,
+            price=100,
+            address="addr",
+            start="10:00",
+            end="12:00",
+            description="Paddle across the lake",
+        )
+
+    def search(self, query):
+        response = self.client.get(self.URL, {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ranked_results(self):
+        data = self.search("lake")
+        # a name match outranks a description match
+        self.assertEqual([room["name"] for room in data["rooms"]], ["Lake house", "Quiet cabin"])
+        self.assertEqual([experience["name"] for experience in data["experiences"]], ["Lake kayaking"])
+        self.assertEqual([room["name"] for room in self.search("stat")["rooms"]], ["City loft"])
+
+    def test_sparse_fields(self):
+        # room and experience search, each hydrated without the photos prefetch
+        with self.assertNumQueries(4):
+            response = self.client.get(self.URL, {"q": "lake", "fields": "pk,name"})
+        self.assertEqual(set(response.json()["rooms"][0]), {"pk", "name"})
+
+    def test_index_follows_changes(self):
+        room = Room.objects.get(name="City loft")
+        room.name = "Mountain loft"
+        room.save()
+        self.assertEqual(self.search("city")["rooms"], [])
+        self.assertEqual(len(self.search("mountain")["rooms"]), 1)
+        room.delete()
+        self.assertEqual(self.search("mountain")["rooms"], [])
+
+    def test_query_syntax_is_ignored(self):
+        self.assertEqual(len(self.search('lake" OR "city*')["rooms"]), 0)
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 400)
+
+    def test_rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM search_room")
+        self.assertEqual(self.search("lake")["rooms"], [])
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(len(self.search("lake")["rooms"]), 2)
@@ -0,0 +1,5 @@
+from django.urls import path
+from . import views
+urlpatterns = [
+    path("", views.Search.as_view()),
+]
@@ -0,0 +1,36 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.exceptions import ParseError
+from rooms.models import Room
+from rooms.serializers import RoomListSerializer
+from experiences.models import Experience
+from experiences.serializers import ExperienceListSerializer
+from . import index
+
+
+class Search(APIView):
+
+    limit = 20
+
+    def hydrate(self, queryset, pks):
+        # one query per kind, returned in rank order
+        objects = queryset.in_bulk(pks)
+        return [objects[pk] for pk in pks if pk in objects]
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise ParseError("'q' is required.")
+        rooms = self.hydrate(
+            RoomListSerializer.optimize(Room.objects.all(), request),
+            index.search("room", query, self.limit),
+        )
+        experiences = self.hydrate(
+            ExperienceListSerializer.optimize(Experience.objects.all(), request),
+            index.search("experience", query, self.limit),
+        )
+        context = {"request": request}
+        return Response({
+            "rooms": RoomListSerializer(rooms, many=True, context=context).data,
+            "experiences": ExperienceListSerializer(experiences, many=True, context=context).data,
+        })
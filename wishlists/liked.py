@@ -0,0 +1,41 @@
+from django.core.cache import cache
+from django.db.models import CharField, Value
+from .models import Wishlist
+
+CACHE_TIMEOUT = 60 * 60
+
+
+def cache_key(user_pk):
+    return f"wishlists:{user_pk}:liked"
+
+
+def load_liked(user_pk):
+    rooms = Wishlist.rooms.through.objects.filter(wishlist__user=user_pk).values_list(
+        Value("room", output_field=CharField()), "room_id",
+    )
+    experiences = Wishlist.experiences.through.objects.filter(wishlist__user=user_pk).values_list(
+        Value("experience", output_field=CharField()), "experience_id",
+    )
+    liked = {"room": set(), "experience": set()}
+    for kind, pk in rooms.union(experiences, all=True):
+        liked[kind].add(pk)
+    return liked
+
+
+def get_liked(request):
+    """ Room and experience pks in the user's wishlists, loaded once per request """
+    if request is None or not request.user.is_authenticated:
+        return {"room": set(), "experience": set()}
+    liked = getattr(request, "_liked", None)
+    if liked is None:
+        key = cache_key(request.user.pk)
+        liked = cache.get(key)
+        if liked is None:
+            liked = load_liked(request.user.pk)
+            cache.set(key, liked, CACHE_TIMEOUT)
+        request._liked = liked
+    return liked
+
+
+def invalidate_liked(*user_pks):
+    cache.delete_many([cache_key(pk) for pk in user_pks])
@@ -1,6 +1,15 @@
 from django.db import models
+from django.db.models import Prefetch
 from common.models import CommonModel
 
+class WishlistQuerySet(models.QuerySet):
+
+    def with_items(self, rooms, experiences):
+        return self.prefetch_related(
+            Prefetch("rooms", queryset=rooms),
+            Prefetch("experiences", queryset=experiences),
+        )
+
 class Wishlist(CommonModel):
 
     """ Wishlist Model Definition """
@@ -12,5 +21,8 @@ class Wishlist(CommonModel):
         on_delete=models.CASCADE,
         related_name="wishlists",
     )
+
+    objects = WishlistQuerySet.as_manager()
+
     def __str__(self):
         return self.name
@@ -1,6 +1,8 @@
 from rest_framework.serializers import ModelSerializer
 from .models import Wishlist
+from rooms.models import Room
 from rooms.serializers import RoomListSerializer
+from experiences.models import Experience
 from experiences.serializers import ExperienceListSerializer
 
 class WishlistSerializer(ModelSerializer):
@@ -13,4 +15,12 @@ class WishlistSerializer(ModelSerializer):
             "name",
             "rooms",
             "experiences"
-        )
\ No newline at end of file
+        )
+
+    @classmethod
+    def optimize(cls, queryset):
+        # the nested serializers are built without a request, so with their default fields
+        return queryset.with_items(
+            RoomListSerializer.optimize(Room.objects.all(), None),
+            ExperienceListSerializer.optimize(Experience.objects.all(), None),
+        )
@@ -0,0 +1,38 @@
+from django.db.models.signals import m2m_changed, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from rooms.models import Room
+from experiences.models import Experience
+from .liked import invalidate_liked
+from .models import Wishlist
+
+
+def touch(wishlists):
+    # membership changes do not save the wishlist, keep updated_at meaningful for conditional GETs
+    wishlists.update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Wishlist.rooms.through)
+@receiver(m2m_changed, sender=Wishlist.experiences.through)
+def wishlist_items_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            invalidate_liked(instance.user_id)
+            touch(Wishlist.objects.filter(pk=instance.pk))
+    elif action in ("post_add", "post_remove"):
+        invalidate_liked(*Wishlist.objects.filter(pk__in=pk_set).values_list("user_id", flat=True))
+        touch(Wishlist.objects.filter(pk__in=pk_set))
+    elif action == "pre_clear":
+        invalidate_liked(*instance.wishlists.values_list("user_id", flat=True))
+        touch(instance.wishlists.all())
+
+
+@receiver(pre_delete, sender=Room)
+@receiver(pre_delete, sender=Experience)
+def wishlist_item_deleted(sender, instance, **kwargs):
+    touch(instance.wishlists.all())
+
+
+@receiver(post_delete, sender=Wishlist)
+def wishlist_deleted(sender, instance, **kwargs):
+    invalidate_liked(instance.user_id)
@@ -1,3 +1,121 @@
-from django.test import TestCase
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from rooms.models import Room
+from medias.models import Photo
+from reviews.models import Review
+from users.models import User
+from experiences.models import Experience
+from .liked import load_liked
+from .models import Wishlist
 
-# Create your tests here.
+
+class TestWishlists(APITestCase):
+    URL = "/api/v1/wishlists/"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="guest")
+        self.wishlist = Wishlist.objects.create(name="Trip", user=self.user)
+        self.client.force_login(self.user)
+
+    def add_rooms(self, count):
+        for index in range(count):
+            room = Room.objects.create(
+                name=f"Room {index}",
+                price=100,
+                rooms=1,
+                toilets=1,
+                description="desc",
+                address="addr",
+                kind=Room.RoomKindChoices.ENTIRE_PLACE,
+                owner=self.user,
+            )
+            Photo.objects.create(room=room, file="https://example.com/photo.jpg", description="photo")
+            self.wishlist.rooms.add(room)
+
+    def test_wishlist_queries(self):
+        # session, user, wishlists, rooms, photos, experiences, liked pks
+        self.add_rooms(1)
+        with self.assertNumQueries(7):
+            self.client.get(self.URL)
+        self.add_rooms(3)
+        with self.assertNumQueries(7):
+            response = self.client.get(self.URL)
+        self.assertEqual(len(response.json()[0]["rooms"]), 4)
+
+    def test_stream(self):
+        import json
+        self.add_rooms(2)
+        Wishlist.objects.create(name="Empty", user=self.user)
+        response = self.client.get(self.URL, {"stream": "true"})
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(data, self.client.get(self.URL).json())
+        self.assertEqual([len(wishlist["rooms"]) for wishlist in data], [2, 0])
+
+    def test_conditional_get(self):
+        self.add_rooms(1)
+        url = f"{self.URL}{self.wishlist.pk}"
+        response = self.client.get(url)
+        etag = response["ETag"]
+        # session, user, the updated_at and the member pks queries
+        with self.assertNumQueries(4):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        room = Room.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            room.name = "Renamed"
+            room.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        # photos and reviews leave the room's updated_at alone
+        with self.captureOnCommitCallbacks(execute=True):
+            Photo.objects.create(room=room, file="https://example.com/other.jpg", description="other")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["rooms"][0]["photos"]), 2)
+        etag = response["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(user=self.user, room=room, payload="great", rating=5)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["rooms"][0]["rating"], 5)
+        etag = response["ETag"]
+        self.wishlist.rooms.remove(room)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["rooms"], [])
+        self.assertEqual(self.client.get(f"{self.URL}999").status_code, 404)
+
+    def test_load_liked(self):
+        self.add_rooms(2)
+        experience = Experience.objects.create(
+            name="Experience",
+            host=self.user,
+            price=100,
+            address="addr",
+            start="10:00",
+            end="12:00",
+            description="desc",
+        )
+        Wishlist.objects.create(name="Other", user=self.user).experiences.add(experience)
+        with self.assertNumQueries(1):
+            liked = load_liked(self.user.pk)
+        self.assertEqual(liked["room"], set(self.wishlist.rooms.values_list("pk", flat=True)))
+        self.assertEqual(liked["experience"], {experience.pk})
+
+    def test_room_list_is_liked(self):
+        self.add_rooms(3)
+        room = Room.objects.get(name="Room 1")
+        toggle = f"{self.URL}{self.wishlist.pk}/rooms/{room.pk}"
+        self.client.put(toggle)
+        # session, user, rooms, photos + the liked pks once for the whole page
+        with self.assertNumQueries(5):
+            data = self.client.get("/api/v1/rooms/").json()["results"]
+        self.assertEqual([room["is_liked"] for room in data], [True, False, True])
+        # the liked pks are cached per user until a toggle
+        with self.assertNumQueries(4):
+            self.client.get("/api/v1/rooms/")
+        self.client.put(toggle)
+        data = self.client.get("/api/v1/rooms/").json()["results"]
+        self.assertEqual([room["is_liked"] for room in data], [True, True, True])
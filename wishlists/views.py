@@ -1,9 +1,13 @@
 from django.db import transaction
+from django.db.models import CharField, Value
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import NotFound, ParseError
 from rest_framework.status import HTTP_200_OK
+from common.conditional import conditional
+from common.detail import make_etag, many_detail_versions, version_time
+from common.streaming import stream_json, wants_stream
 from .models import Wishlist
 from rooms.models import Room
 from experiences.models import Experience
@@ -13,7 +17,9 @@ class Wishlists(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        all_wishlists = Wishlist.objects.filter(user=request.user)
+        all_wishlists = WishlistSerializer.optimize(Wishlist.objects.filter(user=request.user))
+        if wants_stream(request):
+            return stream_json(all_wishlists.order_by("pk"), WishlistSerializer, {"request": request})
         serializer = WishlistSerializer(all_wishlists, many=True,
                                         context={"request": request},)
         return Response(serializer.data)
@@ -46,15 +52,48 @@ class Wishlists(APIView):
         else:
             return Response(serializer.errors)
 
+def wishlist_versions(request, pk):
+    """
+    The wishlist's updated_at and the detail version tokens of its rooms and
+    experiences, which signals bump for their photos, videos and reviews too
+    """
+    versions = getattr(request, "_wishlist_versions", None)
+    if versions is None:
+        updated_at = Wishlist.objects.filter(pk=pk, user=request.user).values_list("updated_at", flat=True).first()
+        versions = request._wishlist_versions = False
+        if updated_at:
+            rooms = Wishlist.rooms.through.objects.filter(wishlist=pk).values_list(
+                Value("room", output_field=CharField()), "room_id",
+            )
+            experiences = Wishlist.experiences.through.objects.filter(wishlist=pk).values_list(
+                Value("experience", output_field=CharField()), "experience_id",
+            )
+            items = sorted(rooms.union(experiences, all=True))
+            versions = request._wishlist_versions = (updated_at, items, many_detail_versions(items))
+    return versions
+
+def wishlist_last_modified(request, pk):
+    versions = wishlist_versions(request, pk)
+    if versions:
+        updated_at, _, tokens = versions
+        return max(updated_at, version_time(max(tokens))) if tokens else updated_at
+
+def wishlist_etag(request, pk):
+    versions = wishlist_versions(request, pk)
+    if versions:
+        updated_at, items, tokens = versions
+        return make_etag(pk, updated_at.timestamp(), *items, *tokens)
+
 class WishlistDetail(APIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self, pk, user):
         try:
-            return Wishlist.objects.get(pk=pk, user=user)
+            return WishlistSerializer.optimize(Wishlist.objects.all()).get(pk=pk, user=user)
         except Wishlist.DoesNotExist:
             raise NotFound
 
+    @conditional(etag_func=wishlist_etag, last_modified_func=wishlist_last_modified)
     def get(self, request, pk):
         wishlist = self.get_object(pk, request.user)
         serializer = WishlistSerializer(wishlist, context={"request": request},)